@@ -1,359 +1,192 @@
-
-from . import textures
-from . import geosets
-from . import references
-from . import exceptions
-from . import files
-from . import general
-from . import utils
-
-reload(utils)
-reload(references)
-reload(textures)
-reload(textures.utils)
-reload(textures.setdict)
-reload(textures.base)
-reload(textures.pathmap)
-reload(textures.mapper)
-reload(textures.redshiftnodes)
-reload(textures.filenode)
-reload(textures)
-reload(geosets)
-reload(exceptions)
-reload(files)
-reload(general)
-
-from .utils import *
-from .files import *
-from .references import *
-from .geosets import *
-from .textures import *
-from .exceptions import *
-from .general import *
-
-try:
-    import pymel.core as pc
-except:
-    pass
+'''imaya, functions for working with maya scenes
+
+Submodules are imported on first use and the names they export are looked
+up on first access, so that importing the package does not load maya or
+modules which are not needed. Call reload_all to reload every submodule
+while developing.
+'''
+
+import sys
+import types
+import importlib
+
+
+# submodules whose public names are exported by the package, names of later
+# modules take precedence over those of earlier ones
+_exporting = ['utils', 'files', 'references', 'geosets', 'textures',
+              'exceptions', 'general']
+
+_submodules = _exporting + ['offline', 'batch', 'server',
+                            'profiling']
+
+# all modules of the package in the order reload_all reloads them
+_reloads = [
+        'utils', 'references', 'textures', 'textures.utils',
+        'textures.dircache', 'textures.attrsnapshot', 'textures.inventory',
+        'textures.scope', 'textures.setdict', 'textures.base',
+        'textures.pathmap', 'textures.copier', 'textures.planner',
+        'textures.dedup', 'textures.manifest', 'textures.mapper',
+        'textures.redshiftnodes', 'textures.filenode', 'textures',
+        'offline.base', 'offline.mayaascii', 'offline.mayabinary',
+        'offline.refgraph', 'offline.rewrite', 'offline', 'geosets',
+        'exceptions', 'files', 'general', 'batch', 'server',
+        'profiling']
+
+
+def _import(name):
+    return importlib.import_module('.' + name, __name__)
+
+
+def _public_names(module):
+    names = getattr(module, '__all__', None)
+    if names is None:
+        names = [name for name in dir(module) if not name.startswith('_')]
+    return names
+
+
+def _export(package, module):
+    for name in _public_names(module):
+        setattr(package, name, getattr(module, name))
+
+
+# the public names of the exporting submodules, which tests/test_package.py
+# keeps in sync with them, so that only the submodule which exports a
+# name is imported to look it up
+_exports = {
+        'utils': (
+            'cmds', 'contextlib', 'frameno_re', 'functools', 'getBitString',
+            'getNiceName', 'isMesh', 'isNodeType', 'newScene',
+            'newcomerObjs', 'objSetDiff', 'op', 'pc', 're',
+            'removeLastNumber', 'removeNamespace',
+            'removeNamespaceFromName', 'removeNamespaceFromPathName',
+            'suspendEvaluation', 'suspendRefresh', 'suspendViewport',
+            'undoChunk', 'undoChunkContext'),
+        'files': (
+            'FileInfo', 'addFileInfo', 'cmds', 'export',
+            'extractShadersAndSave', 'getExtension', 'getFileInfo',
+            'getFileType', 'get_file_path', 'importScene', 'is_modified',
+            'newcomerObjs', 'op', 'openFile', 'os', 'pc', 'referenceExists',
+            'rename_scene', 'saveSceneAs', 'save_scene', 'traceback'),
+        'references': (
+            'ReferencePathIndex', 'addRef', 'addReference', 'cmds',
+            'createReference', 'createReferences', 'getCombinedMesh',
+            'getReferences', 'get_reference_paths', 'logger', 'logging',
+            'newScene', 'newcomerObjs', 'om', 'op', 'os', 'pc', 're',
+            'referenceExists', 'referenceInfo', 'referenceNamespace',
+            'referencesExist', 'removeAllReferences', 'removeReference',
+            'removeReferences', 'suspendEvaluation', 'suspendRefresh',
+            'suspendViewport', 'time', 'util'),
+        'geosets': (
+            'GEO_SET_PATTERN', 'createReference', 'currentSceneCompatible',
+            'currentSceneCompatibleWithRef', 'current_scene_compatible',
+            'current_scene_compatible_with_ref', 'geoSetValid',
+            'geo_set_valid', 'geo_sets_compatible',
+            'getCombinedMeshFromSet', 'getGeoSets', 'getReferences',
+            'get_combined_mesh_from_set',
+            'get_combined_meshes_from_current_scene',
+            'get_combined_meshes_from_ref', 'get_geo_sets',
+            'get_geo_sets_from_reference', 'isMesh', 'is_geo_set',
+            'meshesCompatible', 'meshes_compatible', 'pc', 'random', 're',
+            'refs_compatible', 'removeNamespaceFromPathName',
+            'removeReference', 'setsCompatible'),
+        'textures': (
+            'AttributeSnapshot', 'CollectionPlanner', 'CopyEngine',
+            'DirectoryCache', 'FileNode', 'PathMapping',
+            'RedshiftNormalMap', 'RedshiftSprite', 'SetDict', 'SetDictView',
+            'TextureInventory', 'TextureManifest', 'TextureMapper',
+            'TextureNode', 'attrsnapshot', 'base', 'collect_textures',
+            'copier', 'createFileNodes', 'dedup', 'dircache', 'filenode',
+            'find_duplicates', 'getFileNodes', 'getFullpathFromAttr',
+            'get_file_by_extension', 'get_nodes', 'get_sequence_files',
+            'get_uv_tiles', 'inventory', 'is_file', 'iterTextureFiles',
+            'logger', 'logging', 'manifest', 'map_textures', 'mapper', 'op',
+            'pathmap', 'pc', 'planner', 'readPathAttr', 'redshiftnodes',
+            'renameFileNodePath', 'scope', 'scope_nodes', 'set_incremental',
+            'set_paths', 'setdict', 'textureFiles', 'texture_manifest',
+            'texture_mapping', 'util', 'utils'),
+        'exceptions': (
+            'ExportError', 'ShaderApplicationError', 'WorkerError'),
+        'general': (
+            'ArbitraryConf', 'FPS_MAPPINGS', 'OrderedDict',
+            'ShaderApplicationError', 'addCamera', 'addMeshesToGroup',
+            'addOptionVar', 'addShadersToBin', 'aov_re', 'applyCache',
+            'applyShaderToSelection', 'batchRender', 'bins', 'cmds', 'conf',
+            'createComponentChecks', 'createGPUCache',
+            'createRedshiftProxy', 'createShadingNode', 'currentRenderer',
+            'deleteCache', 'displaySmoothness', 'doCreateGeometryCache2',
+            'export', 'findUIObjectByLabel', 'getCameras',
+            'getDisplayLayers', 'getFrameRange', 'getGenericImageName',
+            'getImageFilePrefix', 'getImagesLocation', 'getMeshes',
+            'getOptionVar', 'getOutputFilePaths', 'getProjectPath',
+            'getRenderLayers', 'getRenderPassNames', 'getResolution',
+            'getShadingEngineHistoryChain', 'getShadingEngines',
+            'getShadingFileNodes', 'get_file_path', 'imageInRenderView',
+            'importScene', 'isAnimationOn', 'make_cache', 'maya_version',
+            'mc2mdd', 'objFilter', 'op', 'os', 'pc', 're', 'referenceInfo',
+            'register_mel_procs', 'removeAllLights', 'removeLastNumber',
+            'removeOptionVar', 'render', 'renderpass_re', 'replaceTokens',
+            'resolveAOVsInPath', 'selected', 'setCurrentRenderLayer',
+            'setProjectPath', 'setRenderableCamera', 'snapshot',
+            'subprocess', 'switchToMasterLayer', 'tempfile',
+            'toggleTextureMode', 'toggleViewport2Point0', 'traceback',
+            'userHome', 'util'),
+}
+
+# names of later submodules take precedence over those of earlier ones
+_owners = dict((name, module_name) for module_name in _exporting
+               for name in _exports[module_name])
 
 
 def setConfig(conf):
-    general.conf = conf
-
-
-doCreateGeometryCache2 = r'''
-global proc string[] doCreateGeometryCache2 ( int $version, string $args[] )
-//A facsimle copy of doCreateGeometryCache just that args[6] i.e. export cache
-//per geometry is fixed to 1 regardless of group caching
-{
-        string $cacheFiles[];
-        if(( $version > 5 ) || ( size($args) > 16 )) {
-                error( (uiRes("m_doCreateGeometryCache.kBadArgsError")));
-                return $cacheFiles;
-        }
-
-        string  $cacheDirectory         = "";
-        string  $fileName                       = "";
-        int             $useAsPrefix            = 0;
-        int             $perGeometry            = 0;
-        string  $action        = "replace";
-        int     $force = 0;
-        int             $inherit = 0;
-        int     $doubleToFloat = 0;
-        string $distribution = "OneFilePerFrame";
-
-        int     $rangeMode                      = $args[0];
-        float   $diskCacheStartTime = $args[1];
-        float   $diskCacheEndTime   = $args[2];
-        float   $simulationRate         = 1.0;
-        int             $sampleMultiplier       = 1;
-
-        float  $startTime = $diskCacheStartTime;
-        float  $endTime = $diskCacheEndTime;
-        string $format = "mcc";         // Maya's default internal format
-
-        if( $rangeMode == 1 ) {
-        $startTime = `getAttr defaultRenderGlobals.startFrame`;
-        $endTime = `getAttr defaultRenderGlobals.endFrame`;
-        } else if( $rangeMode == 2 ) {
-                $startTime = `playbackOptions -q -min`;
-                $endTime = `playbackOptions -q -max`;
-        }
-
-        if ($version > 1) {
-            $distribution = $args[3];
-                $cacheDirectory = $args[5];
-                $perGeometry = $args[6];
-                $fileName = $args[7];
-                $useAsPrefix = $args[8];
-        }
-        if ($version > 2) {
-                $action = $args[9];
-                $force = $args[10];
-
-                if( size($args) > 11 ) {
-                        $simulationRate = $args[11];
-                }
-                if( size($args) > 12 ) {
-                        $sampleMultiplier = $args[12];
-                }
-                else {
-                        $sampleMultiplier = 1;
-                }
-        }
-        if( $version > 3 ) {
-                $inherit = $args[13];
-                $doubleToFloat = $args[14];
-        }
-
-        if( $version > 4 ) {
-                $format = $args[15];
-        }
-
-        // Call doMergeCache instead since it handles gaps between
-        // caches correctly.
-        if( $action == "merge" || $action == "mergeDelete" )
-        {
-
-                string $mergeArgs[];
-                $mergeArgs[0] = 1;
-                $mergeArgs[1] = $startTime;
-                $mergeArgs[2] = $endTime;
-                $mergeArgs[3] = $args[3];
-                $mergeArgs[4] = $cacheDirectory;
-                $mergeArgs[5] = $fileName;
-                $mergeArgs[6] = $useAsPrefix;
-                $mergeArgs[7] = $force;
-                $mergeArgs[8] = $simulationRate;
-                $mergeArgs[9] = $sampleMultiplier;
-                $mergeArgs[10] = $action;
-                $mergeArgs[11] = "geom";
-                $mergeArgs[12] = $format;
-                return doMergeCache(2, $mergeArgs);
-        }
-
-        // If we're replacing a cache, and inheriting modifications,
-        // the new cache should have the same translation, scaling
-        // and clipping as the original. So store these values and
-        // set after cache creation.
-        //
-        float $startFrame[] = {};
-        float $sourceStart[] = {};
-        float $sourceEnd[] = {};
-        float $scale[] = {};
-
-        select -d `ls -sl -type cacheFile`;
-        string $objsToCache[] = getGeometriesToCache();
-        if (size($objsToCache) == 0) {
-                error((uiRes("m_doCreateGeometryCache.kMustSelectGeom")));
-        } else  if ($action == "replace") {
-                if (!getCacheCanBeReplaced($objsToCache)) {
-                        return $cacheFiles;
-                }
-
-                if( $inherit ) {
-                        string $obj, $cache;
-                        for( $obj in $objsToCache ) {
-                                string $existing[] = findExistingCaches($obj);
-                                int $index = size($startFrame);
-                                $startFrame[$index] = `getAttr ($existing[0]+".startFrame")`;
-                                $sourceStart[$index] = `getAttr ($existing[0]+".sourceStart")`;
-                                $sourceEnd[$index] = `getAttr ($existing[0]+".sourceEnd")`;
-                                $scale[$index] = `getAttr ($existing[0]+".scale")`;
-                        }
-                }
-        }
-
-        // If the user has existing cache groups on some of the geometry,
-        // then they cannot attach new caches per geometry.
-        //
-    string $cacheGroups[] = `getObjectsByCacheGroup($objsToCache)`;
-        if (size($cacheGroups) != size($objsToCache)) {
-                $perGeometry = 1;
-                $args[6] = 1; // used below in generating cache file command
-                //warning( (uiRes("m_doCreateGeometryCache.kIgnoringPerGeometry")) );
-        }
-
-        // Check if directory has caches that might be overwritten
-        //
-        string $cacheDirectory = getCacheDirectory(     $cacheDirectory, "fileCache",
-                                                                                                $objsToCache, $fileName,
-                                                                                                $useAsPrefix, $perGeometry,
-                                                                                                $action, $force, 1);
-
-        if ($cacheDirectory == "") {
-                return $cacheFiles;
-        }
-        else if ($cacheDirectory == "rename") {
-                performCreateGeometryCache 1 $action;
-                error((uiRes("m_doCreateGeometryCache.kNameAlreadyInUse")));
-                return $cacheFiles;
-        }
-
-        // if we're replacing, delete active caches.
-        //
-        if( $action == "replace" ) {
-                for( $obj in $objsToCache ) {
-                        string $all[] = findExistingCaches($obj);
-                        for( $cache in $all) {
-                                if( `getAttr ($cache+".enable")`) {
-                                        deleteCacheFile(2, {"keep",$cache});
-                                }
-                        }
-                }
-        }
-
-        // create the cache(s)
-        //
-        if ($action == "add" || $action == "replace") {
-                setCacheEnable(0, 1, $objsToCache);
-        }
-
-        // generate the cacheFile command to write the caches
-        //
-        string $cacheCmd = getCacheFileCmd($version, $cacheDirectory, $args);
-        int $ii = 0;
-
-        //segmented cache files are employed in the case of one large cache file that
-        //exceeds 2GB in size.  Since we currently cannot handle such large files, we will
-        //automatically generate several caches, each less than 2GB.
-        int $useSegmentedCacheFile = 0;
-        int $numSegments = 0;
-        if($distribution == "OneFile" && !$perGeometry) {
-            string $queryCacheSizeCmd = "cacheFile";
-            for ($ii = 0; $ii < size($objsToCache); $ii++) {
-                    $queryCacheSizeCmd += (" -points "+$objsToCache[$ii]);
-            }
-            $queryCacheSizeCmd += " -q -dataSize";
-            if($doubleToFloat) {
-                $queryCacheSizeCmd += " -dtf";
-            }
-            float $dataSizePerFrame = `eval $queryCacheSizeCmd`;
-            float $maxSize = 2147000000; //approximate size of max signed int.
-            float $numSamples = ($endTime - $startTime + 1.0)/($simulationRate*$sampleMultiplier);
-            float $dataSize = $dataSizePerFrame*$numSamples;
-            if($dataSize > $maxSize) {
-                $useSegmentedCacheFile = 1;
-                $numSegments = floor($dataSize / $maxSize) + 1;
-            }
-        }
-
-        if(!$useSegmentedCacheFile) {
-            if( $fileName != "" ) {
-                    $cacheCmd += ("-fileName \"" + $fileName + "\" ");
-            }
-            $cacheCmd += ("-st "+$startTime+" -et "+$endTime);
-            for ($ii = 0; $ii < size($objsToCache); $ii++) {
-                    $cacheCmd += (" -points "+$objsToCache[$ii]);
-            }
-            $cacheFiles = `eval $cacheCmd`;
-        }
-        else {
-            int $jj;
-            float $segmentStartTime = $startTime;
-            float $segmentEndTime;
-            float $segmentLength = ($endTime - $startTime)/$numSegments;
-            string $segmentCacheCmd ;
-            string $segmentCacheName = "";
-            string $segmentCacheFiles[];
-            for($jj = 0; $jj< $numSegments; $jj++) {
-                $segmentCacheCmd = $cacheCmd;
-                if($fileName != "")
-                    $segmentCacheName = $fileName;
-                else
-                    $segmentCacheName = getAutomaticCacheName();
-                $segmentEndTime = $segmentStartTime + floor($segmentLength);
-
-                $segmentCacheName += ("Segment" + ($jj+1));
-                $segmentCacheCmd += (" -fileName \"" + $segmentCacheName + "\" ");
-
-                $segmentCacheCmd += ("-st "+$segmentStartTime+" -et "+$segmentEndTime);
-                for ($ii = 0; $ii < size($objsToCache); $ii++) {
-                        $segmentCacheCmd += (" -points "+$objsToCache[$ii]);
-                }
-                $segmentCacheFiles = `eval $segmentCacheCmd`;
-                $segmentStartTime = $segmentEndTime + 1;
-
-                $cacheFiles[size($cacheFiles)] = $segmentCacheFiles[0];
-            }
-    }
-
-        if ($action == "export") {
-                for ($ii = 0; $ii < size($cacheFiles); $ii++) {
-                        $cacheFiles[$ii] = ($cacheDirectory+"/"+$cacheFiles[$ii]+".xml");
-                }
-                // In export mode, we do not want to attach the cache. We are done.
-                //
-                return $cacheFiles;
-        }
-
-
-        // attach the caches to the history switch
-        //
-        if($useSegmentedCacheFile) {
-            if(size($objsToCache) == 1) {
-                for($ii=0;$ii<size($cacheFiles);$ii++) {
-                    string $segmentCacheFile[];
-                    $segmentCacheFile[0] = $cacheFiles[$ii];
-                    attachOneCachePerGeometry(  $segmentCacheFile, $objsToCache,
-                                                                        $cacheDirectory, $action, $format );
-                }
-            }
-            else {
-                for($ii=0;$ii<size($cacheFiles);$ii++) {
-                    string $segmentCacheFile[];
-                    $segmentCacheFile[0] = $cacheFiles[$ii];
-                    attachCacheGroups( $segmentCacheFile,$objsToCache,$cacheDirectory,$action, $format );
-                }
-            }
-
-        }
-        else if( $perGeometry || size($objsToCache) == 1) {
-                attachOneCachePerGeometry(      $cacheFiles, $objsToCache,
-                                                                        $cacheDirectory, $action, $format );
-        } else {
-                if( size($cacheFiles) != 1 ) {
-                        error( (uiRes("m_doCreateGeometryCache.kInvalidCacheOptions")));
-                }
-
-                attachCacheGroups( $cacheFiles,$objsToCache,$cacheDirectory,$action, $format );
-
-        }
-
-        // If we're replacing a cache and inheriting modifications,
-        // restore the translation, scaling, clipping etc.
-        if( $action == "replace" && $inherit )
-        {
-                int $i = 0;
-                for( $i = 0; $i < size($objsToCache); $i++)
-                {
-                        string $cache[] = findExistingCaches($objsToCache[$i]);
-                        float $sStart = `getAttr ($cache[0]+".sourceStart")`;
-                        float $sEnd = `getAttr ($cache[0]+".sourceEnd")`;
-
-                        if( $sStart != $sourceStart[$i] &&
-                                $sourceStart[$i] >= $sStart &&
-                                $sourceStart[$i] <= $sEnd )
-                        {
-                                cacheClipTrimBefore( $cache[0], $sourceStart[$i] );
-                        }
-
-                        if( $sEnd != $sourceEnd[$i] &&
-                                $sourceEnd[$i] >= $sStart &&
-                                $sourceEnd[$i] <= $sEnd )
-                        {
-                                cacheClipTrimAfter( $cache[0], $sourceEnd[$i] );
-                        }
-
-                        setAttr ($cache[0] + ".startFrame") $startFrame[$i];
-                        setAttr ($cache[0] + ".scale") $scale[$i];
-                }
-        }
-        select -r $objsToCache;
-        return $cacheFiles;
-};'''
-
-try:
-    pc.Mel.eval(doCreateGeometryCache2)
-except:
-    pass
+    _import('general').conf = conf
+
+
+def reload_all():
+    '''Reload all submodules in dependency order and export their names again,
+    for use while developing imaya'''
+    package = sys.modules[__name__]
+    for name in _reloads:
+        reload(_import(name))
+    for name in _exporting:
+        _export(package, _import(name))
+
+
+class _LazyPackage(types.ModuleType):
+    ''' The package module, which imports submodules and looks up the names
+    they export on first access '''
+
+    def __getattr__(self, name):
+        if name == '__all__':
+            # a star import of the package imports all exporting submodules
+            names = set(_submodules + ['setConfig', 'reload_all'])
+            for module_name in _exporting:
+                names.update(_public_names(_import(module_name)))
+            return sorted(names)
+        if name.startswith('__'):
+            raise AttributeError(name)
+        if name in _submodules:
+            return _import(name)
+        owner = _owners.get(name)
+        if owner is not None:
+            module = _import(owner)
+            if name in _public_names(module):
+                value = getattr(module, name)
+                setattr(self, name, value)
+                return value
+        raise AttributeError("'module' object has no attribute '%s'" % name)
+
+    def __dir__(self):
+        names = set(self.__dict__)
+        names.update(_submodules)
+        names.update(_owners)
+        return sorted(names)
+
+
+_package = _LazyPackage(__name__, __doc__)
+_package.__dict__.update(
+        (key, value) for key, value in globals().items()
+        if key not in ('_package', '__doc__'))
+# the original module stays referenced so its globals, which the functions
+# above use, are not cleared
+_package._module = sys.modules[__name__]
+sys.modules[__name__] = _package
@@ -0,0 +1,285 @@
+'''Contains a runner which applies imaya operations to many scenes over a
+pool of worker processes'''
+
+import time
+import traceback
+import importlib
+import multiprocessing
+from collections import namedtuple, deque
+
+
+BatchResult = namedtuple('BatchResult', [
+    'scene', 'operation', 'status', 'result', 'error', 'attempts',
+    'duration'])
+
+
+def plain(value):
+    ''' value with everything but builtin types converted to strings, so that
+    results such as pymel nodes can be sent between processes '''
+    if isinstance(value, dict):
+        return dict((plain(key), plain(val)) for key, val in value.items())
+    if isinstance(value, tuple) and hasattr(value, '_fields'):
+        # namedtuples take their fields as separate arguments
+        return type(value)(*[plain(val) for val in value])
+    for typ in (list, tuple, set, frozenset):
+        if isinstance(value, typ):
+            # other subclasses become their builtin type
+            return typ(plain(val) for val in value)
+    if value is None or isinstance(value, (basestring, bool, int, long,
+                                           float)):
+        return value
+    return str(value)
+
+
+class MayaWorker(object):
+    ''' Runs operations of the imaya package on scenes in a maya standalone
+    session which is started once. Each scene is opened for its operation and
+    replaced by a new scene afterwards. plugins are loaded once when the
+    session starts '''
+
+    def __init__(self, plugins=()):
+        self.plugins = plugins
+
+    def setup(self):
+        import maya.standalone
+        maya.standalone.initialize()
+        import maya.cmds as cmds
+        for plugin in self.plugins:
+            cmds.loadPlugin(plugin, quiet=True)
+        self.imaya = importlib.import_module(__name__.rpartition('.')[0])
+
+    def operation(self, name):
+        return getattr(self.imaya, name)
+
+    def run(self, scene, operation, args=(), kwargs=None):
+        try:
+            if scene:
+                self.imaya.openFile(scene, prompt=0, onError='raise')
+            return self.operation(operation)(*args, **(kwargs or {}))
+        finally:
+            self.reset()
+
+    def reset(self):
+        self.imaya.newScene()
+
+
+class StandInWorker(MayaWorker):
+    ''' Runs operations without maya. Operations named in stand_ins are
+    answered from the scene file by the offline readers, others must be
+    functions which are called with the scene as their first argument '''
+
+    stand_ins = {
+            'get_reference_paths': 'read_reference_paths',
+            'referenceInfo': 'read_reference_paths',
+            'textureFiles': 'read_texture_files'}
+
+    def setup(self):
+        self.imaya = None
+
+    def operation(self, name):
+        return name
+
+    def run(self, scene, operation, args=(), kwargs=None):
+        if not callable(operation):
+            from . import offline
+            operation = getattr(offline, self.stand_ins[operation])
+        return operation(scene, *args, **(kwargs or {}))
+
+    def reset(self):
+        pass
+
+
+def _serve(conn, worker_class):
+    ''' the main loop of a worker process, jobs are received over conn until
+    None is received '''
+    worker = worker_class()
+    try:
+        worker.setup()
+    except Exception:
+        conn.send(('error', None, traceback.format_exc()))
+        return
+    conn.send(('ready', None, None))
+    while True:
+        job = conn.recv()
+        if job is None:
+            break
+        try:
+            result = plain(worker.run(*job))
+        except Exception:
+            conn.send(('error', None, traceback.format_exc()))
+        else:
+            conn.send(('ok', result, None))
+
+
+class _Process(object):
+    ''' a worker process and the job it is running '''
+
+    def __init__(self, worker_class):
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+                target=_serve, args=(child_conn, worker_class))
+        self.process.daemon = True
+        self.process.start()
+        self.ready = False
+        self.job = None
+        self.started = None
+
+    def submit(self, job):
+        self.job = job
+        self.started = time.time()
+        self.conn.send(job[:4])
+
+    def stop(self, timeout=1):
+        if self.process.is_alive():
+            try:
+                self.conn.send(None)
+            except (IOError, EOFError):
+                pass
+            self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+
+    def kill(self):
+        self.process.terminate()
+        self.process.join()
+
+
+class BatchRunner(object):
+    ''' Applies operations to scenes over a pool of worker processes and
+    yields a BatchResult for each scene as it finishes.
+
+    Workers live for the whole run and take one scene at a time. A scene
+    which takes longer than timeout seconds has its worker killed and is
+    reported with status 'timeout'. A worker which dies while working on a
+    scene is replaced and the scene retried up to retries times before it is
+    reported as 'crashed'. Exceptions raised by an operation are reported as
+    'error' with their traceback and not retried.
+
+    worker is MayaWorker by default, StandInWorker runs without maya '''
+
+    workers = 4
+    poll_interval = 0.05
+
+    def __init__(self, workers=None, worker=MayaWorker, timeout=None,
+                 retries=1):
+        if workers is not None:
+            self.workers = max(1, int(workers))
+        self.worker = worker
+        self.timeout = timeout
+        self.retries = retries
+
+    def _result(self, job, status, result=None, error=None, duration=0):
+        scene, operation, _, _, attempts = job
+        name = getattr(operation, '__name__', operation)
+        return BatchResult(scene, name, status, result, error, attempts,
+                           duration)
+
+    def run(self, scenes, operation, *args, **kwargs):
+        ''' apply operation to every scene, operation is the name of an imaya
+        function or for StandInWorker a function taking the scene
+        :return: generator of BatchResult in order of completion'''
+        return self.run_jobs([(scene, operation, args, kwargs)
+                              for scene in scenes])
+
+    def run_jobs(self, jobs):
+        ''':jobs: list of (scene, operation, args, kwargs)
+        :return: generator of BatchResult in order of completion'''
+        pending = deque(tuple(job) + (1,) for job in jobs)
+        if not pending:
+            return
+        processes = [_Process(self.worker)
+                     for _ in range(min(self.workers, len(pending)))]
+        try:
+            while pending or any(proc.job for proc in processes):
+                active = False
+                for index in range(len(processes)):
+                    results, polled = self._poll(index, processes, pending)
+                    active = active or polled
+                    for result in results:
+                        yield result
+                if not active:
+                    time.sleep(self.poll_interval)
+        finally:
+            for proc in processes:
+                proc.stop()
+
+    def _replace(self, index, processes):
+        processes[index].kill()
+        processes[index] = _Process(self.worker)
+
+    def _poll(self, index, processes, pending):
+        ''' collect what a worker sent and hand it the next scene when idle
+        :return: (list of BatchResult, whether anything happened)'''
+        proc = processes[index]
+        results, active = [], False
+        if proc.conn.poll():
+            active = True
+            try:
+                status, result, error = proc.conn.recv()
+            except (IOError, EOFError):
+                status = None
+            if status is None:
+                results.extend(self._crashed(index, processes, pending))
+            elif status == 'ready':
+                proc.ready = True
+            elif proc.job is None:
+                # setting up the worker failed, the scene it would have
+                # taken next fails with the error
+                self._replace(index, processes)
+                if pending:
+                    results.append(self._result(pending.popleft(), status,
+                                                error=error))
+            else:
+                results.append(self._result(proc.job, status, result, error,
+                                            time.time() - proc.started))
+                proc.job = None
+        elif not proc.process.is_alive():
+            active = True
+            results.extend(self._crashed(index, processes, pending))
+        elif (proc.job is not None and self.timeout is not None and
+                time.time() - proc.started > self.timeout):
+            active = True
+            job, started = proc.job, proc.started
+            self._replace(index, processes)
+            results.append(self._result(
+                job, 'timeout', error='timed out after %ss' % self.timeout,
+                duration=time.time() - started))
+
+        proc = processes[index]
+        if proc.ready and proc.job is None and pending:
+            active = True
+            proc.submit(pending.popleft())
+        return results, active
+
+    def _crashed(self, index, processes, pending):
+        ''' replace a worker which exited and retry its scene '''
+        job = processes[index].job
+        self._replace(index, processes)
+        if job is None:
+            # a worker which cannot even be set up takes the next scene down
+            # with it rather than being restarted forever
+            if pending:
+                return [self._result(pending.popleft(), 'crashed',
+                                     error='worker exited before it was '
+                                     'ready')]
+            return []
+        scene, operation, args, kwargs, attempts = job
+        if attempts <= self.retries:
+            pending.appendleft((scene, operation, args, kwargs,
+                                attempts + 1))
+            return []
+        return [self._result(job, 'crashed',
+                             error='worker exited while running the job')]
+
+
+def run_batch(scenes, operation, args=(), kwargs=None, workers=None,
+              timeout=None, retries=1, stand_in=False):
+    '''apply an imaya operation, e.g. collect_textures or
+    get_reference_paths, to many scenes over a pool of worker processes.
+    args and kwargs are passed to the operation
+    :return: generator of BatchResult'''
+    worker = StandInWorker if stand_in else MayaWorker
+    return BatchRunner(workers=workers, worker=worker, timeout=timeout,
+                       retries=retries).run(scenes, operation, *args,
+                                            **(kwargs or {}))
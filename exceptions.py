@@ -25,3 +25,19 @@ class ShaderApplicationError(Exception):
 
     def __str__(self):
         return "ShaderApplicationError: ", self.error
+
+
+class WorkerError(Exception):
+    '''
+    A job failed in a worker process.
+    '''
+    def __init__(self, *arg, **kwarg):
+        self.code = 2
+        self.error = "Job failed in worker"
+        self.value = kwarg.get("obj", "")
+        self.traceback = kwarg.get("traceback", "")
+        self.strerror = self.__str__()
+
+    def __str__(self):
+        return (self.value + ". " if self.value else "") + self.error + (
+                "\n" + self.traceback if self.traceback else "")
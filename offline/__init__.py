@@ -0,0 +1,35 @@
+'''Contains readers for maya scene files which do not need a maya session'''
+
+import os.path as op
+
+from .base import *
+from .mayaascii import *
+from .mayabinary import *
+from .refgraph import *
+from .rewrite import *
+
+
+readers = {'.ma': MayaAsciiReader, '.mb': MayaBinaryReader}
+
+
+def scene_reader(path, texture_attrs=None):
+    '''a reader for the scene at path chosen by its extension
+    :raises ValueError: if there is no reader for the extension'''
+    ext = op.splitext(path)[1].lower()
+    if ext not in readers:
+        raise ValueError('No offline reader for %s' % path)
+    return readers[ext](path, texture_attrs=texture_attrs)
+
+
+def read_texture_files(path, key=lambda x: True, aux=True, resolve=True,
+                       root=None):
+    '''texture files of a maya scene without opening it in maya
+    :return: SetDict {ftn: files}'''
+    return scene_reader(path).read().texture_files(
+            key=key, aux=aux, resolve=resolve, root=root)
+
+
+def read_reference_paths(path):
+    '''top level references of a maya scene without opening it in maya
+    :return: {refNode: path}'''
+    return dict(scene_reader(path, texture_attrs={}).read().references)
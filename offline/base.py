@@ -0,0 +1,90 @@
+'''Contains what the offline scene readers have in common'''
+
+import os.path as op
+from abc import ABCMeta, abstractmethod
+
+from ..textures.setdict import SetDict
+from ..textures.dircache import DirectoryCache
+
+
+__all__ = ['SceneReader', 'texture_attrs']
+
+
+# path attributes of the default texture types by node type, long names
+# included, used where the registered texture types cannot be imported
+texture_attrs = {
+        'file': ('ftn', 'fileTextureName'),
+        'RedshiftSprite': ('tex0',),
+        'RedshiftNormalMap': ('tex0',)}
+long_names = {'ftn': 'fileTextureName'}
+
+
+def registered_texture_attrs():
+    ''' path attributes of the texture types registered with TextureMapper,
+    falls back to texture_attrs when they cannot be imported
+    :return: {node_type: tuple of attribute names}'''
+    try:
+        from ..textures.mapper import TextureMapper
+    except ImportError:
+        return dict(texture_attrs)
+    attrs = {}
+    for typ in TextureMapper.get_texture_types():
+        names = set(attr for attr in (typ._path_write_attr,
+                                      typ._path_read_attr) if attr)
+        names.update(long_names[attr] for attr in list(names)
+                     if attr in long_names)
+        attrs[typ._node_type] = tuple(sorted(names))
+    return attrs
+
+
+class SceneReader(object):
+    ''' Base of the readers which list the references and the texture paths
+    of a scene file without maya. Subclasses fill references with
+    {refNode: path} and textures with (node_type, node, path) in _read '''
+
+    __metaclass__ = ABCMeta
+
+    def __init__(self, path, texture_attrs=None):
+        self.path = path
+        if texture_attrs is None:
+            texture_attrs = registered_texture_attrs()
+        self.texture_attrs = dict((node_type, set(attrs)) for node_type, attrs
+                                  in texture_attrs.items())
+        self.references = {}
+        self.textures = []
+
+    @abstractmethod
+    def _read(self):
+        ''' fill references and textures from the scene file '''
+
+    def read(self):
+        ''' read the scene
+        :return: self'''
+        self.references.clear()
+        del self.textures[:]
+        self._read()
+        return self
+
+    def texture_files(self, key=lambda x: True, aux=True, resolve=True,
+                      root=None):
+        ''' texture files of the scene in the shape textureFiles returns them.
+        Relative paths are taken relative to root, uv tile tokens are
+        expanded and only existing files are kept when resolve is set
+        :return: SetDict'''
+        file_texs = SetDict()
+        with DirectoryCache.scan() as cache:
+            for node_type, node, path in self.textures:
+                path = op.normpath(op.join(root or '', op.expandvars(path)))
+                if not resolve:
+                    files = [path]
+                else:
+                    files = cache.get_uv_tiles(path)
+                    if not files and cache.is_file(path):
+                        files = [path]
+                    if aux:
+                        files.extend(filter(None, [
+                            cache.get_file_by_extension(_path, ext)
+                            for _path in files for ext in ('tx', 'tex')]))
+                file_texs[path].update(
+                        filepath for filepath in files if key(filepath))
+        return file_texs
@@ -0,0 +1,163 @@
+'''Contains a streaming reader for mayaAscii scenes which lists textures and
+references without maya'''
+
+import re
+
+from .base import SceneReader
+
+
+__all__ = ['MayaAsciiReader']
+
+
+class MayaAsciiReader(SceneReader):
+    ''' Reads the top level references of a mayaAscii scene and the paths of
+    its texture nodes in a single pass.
+
+    The scene is read line by line. Only statements which can carry a
+    reference or a texture path are kept until they end, all others are
+    skipped as they are read, so memory does not grow with the size of the
+    scene. Reference edits are not applied '''
+
+    _string = r'"(?:[^"\\]|\\.)*"'
+    _end_re = re.compile(r'(?:[^";]|%s)*;' % _string)
+    _token_re = re.compile(r'(%s)|([^\s"]+)' % _string)
+    _escape_re = re.compile(r'\\(.)')
+    _escapes = {'n': '\n', 't': '\t', 'r': '\r'}
+    # the attribute is the first string of setAttr, flags before it such as
+    # -k on or -s 4 take unquoted values
+    _attr_re = re.compile(r'\s*setAttr\s[^"]*"\.(\w+)"')
+
+    def __init__(self, path, texture_attrs=None):
+        super(MayaAsciiReader, self).__init__(path, texture_attrs)
+        self._node = None
+        self._nodes = {}
+
+    def _reset(self):
+        self._node = None
+        self._nodes.clear()
+
+    @classmethod
+    def _unquote(cls, token):
+        return cls._escape_re.sub(
+                lambda match: cls._escapes.get(match.group(1),
+                                               match.group(1)),
+                token[1:-1])
+
+    @classmethod
+    def tokens(cls, statement):
+        ''' the words of a mel statement, quoted strings are unescaped and
+        strings concatenated with + are joined, also where maya writes long
+        strings as ("..." + "...") '''
+        tokens, concat = [], False
+        for match in cls._token_re.finditer(statement.rstrip().rstrip(';')):
+            string, word = match.groups()
+            if word == '+':
+                concat = True
+                continue
+            if word is not None and not word.strip('()'):
+                continue
+            if string is not None:
+                string = cls._unquote(string)
+                if concat and tokens:
+                    tokens[-1] += string
+                else:
+                    tokens.append(string)
+            else:
+                tokens.append(word)
+            concat = False
+        return tokens
+
+    def _wanted(self, line):
+        ''' whether the statement starting with line should be kept '''
+        command = line.split(None, 1)[0] if line.strip() else ''
+        if command in ('file', 'createNode', 'select', 'rename'):
+            return True
+        if command == 'setAttr' and self._node is not None:
+            match = self._attr_re.match(line)
+            return (match is not None and
+                    match.group(1) in self.texture_attrs[self._node[0]])
+        return False
+
+    def lines(self, scene):
+        ''' the lines of scene as (line, keep, end) where keep tells whether
+        the line belongs to a statement which matters to the reader and end
+        whether it ends its statement. Statements are ended by a semicolon
+        outside of quotes which always comes last on its line in mayaAscii '''
+        in_statement, keep = False, False
+        for line in scene:
+            if not in_statement:
+                stripped = line.strip()
+                if not stripped or stripped.startswith('//'):
+                    yield line, False, True
+                    continue
+                in_statement, keep = True, self._wanted(line)
+            end = self._end_re.match(line) is not None
+            if end:
+                in_statement = False
+            yield line, keep, end
+
+    def statements(self):
+        ''' the statements of the scene which matter to the reader, each as
+        the text of the statement '''
+        with open(self.path, 'rb') as scene:
+            statement = []
+            for line, keep, end in self.lines(scene):
+                if keep:
+                    statement.append(line)
+                    if end:
+                        yield ''.join(statement)
+                        statement = []
+
+    @staticmethod
+    def _flag(tokens, *flags):
+        for index, token in enumerate(tokens[:-1]):
+            if token in flags:
+                return tokens[index + 1]
+
+    def _statement(self, tokens):
+        command = tokens[0]
+        if command == 'file':
+            if '-r' in tokens or '-reference' in tokens:
+                ref_node = self._flag(tokens, '-rfn', '-referenceNode')
+                self.references[ref_node] = tokens[-1]
+        elif command == 'createNode':
+            node_type = tokens[1]
+            if node_type in self.texture_attrs:
+                self._node = (node_type,
+                              self._flag(tokens, '-n', '-name') or node_type)
+                self._nodes[self._node[1]] = node_type
+            else:
+                self._node = None
+        elif command == 'select':
+            # select -ne node makes node current again, setAttr statements
+            # which follow apply to it
+            names = [token for token in tokens[1:]
+                     if not token.startswith('-')]
+            if len(names) == 1 and names[0] in self._nodes:
+                self._node = (self._nodes[names[0]], names[0])
+            else:
+                self._node = None
+        elif command == 'rename':
+            self._rename(tokens)
+        elif (command == 'setAttr' and self._node is not None and
+                self._flag(tokens, '-type', '-typ') == 'string'):
+            self.textures.append(self._node + (tokens[-1],))
+
+    def _rename(self, tokens):
+        ''' rename -uid written after every createNode since maya 2016 only
+        sets the uuid, a rename of the current node keeps it current '''
+        if '-uid' in tokens or '-uuid' in tokens:
+            return
+        names = [token for token in tokens[1:] if not token.startswith('-')]
+        if self._node is None or not names:
+            return
+        node_type, node = self._node
+        if len(names) == 1 or names[0] == node:
+            self._nodes.pop(node, None)
+            self._node = (node_type, names[-1])
+            self._nodes[names[-1]] = node_type
+
+    def _read(self):
+        self._reset()
+        for statement in self.statements():
+            self._statement(self.tokens(statement))
@@ -0,0 +1,218 @@
+'''Contains a lazy IFF chunk reader for mayaBinary scenes which lists
+references, file info, plugins and textures without maya'''
+
+import mmap
+import struct
+
+from .base import SceneReader
+
+
+__all__ = ['IffChunk', 'IffReader', 'MayaBinaryReader']
+
+
+class IffChunk(object):
+    ''' A chunk of an IFF file. Data starts at offset, group chunks have a
+    form type and their child chunks follow it '''
+
+    __slots__ = ('tag', 'offset', 'size', 'form')
+
+    def __init__(self, tag, offset, size, form=None):
+        self.tag = tag
+        self.offset = offset
+        self.size = size
+        self.form = form
+
+    @property
+    def end(self):
+        return self.offset + self.size
+
+    def __repr__(self):
+        return '%s(%r, %d, %d, %r)' % (self.__class__.__name__, self.tag,
+                                       self.offset, self.size, self.form)
+
+
+class IffReader(object):
+    ''' Walks the chunk tree of an IFF file by seeking from header to header,
+    only the data of chunks which are asked for is read. The file is memory
+    mapped where possible and read through seeks otherwise.
+
+    Files starting with FOR4 have 4 byte tags and sizes and 4 byte aligned
+    chunks. Files starting with FOR8 have 8 byte aligned chunks whose header
+    is the 4 byte tag, 4 bytes of padding and an 8 byte size, and whose form
+    type is padded to 8 bytes as well '''
+
+    group_tags = ('FOR4', 'LIS4', 'CAT4', 'PROP', 'FOR8', 'LIS8', 'CAT8')
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._data = mmap.mmap(self._file.fileno(), 0,
+                                   access=mmap.ACCESS_READ)
+        except (ValueError, EnvironmentError):
+            self._data = None
+        self.size = self._size()
+        magic = self.read(0, 4)
+        if magic == 'FOR8':
+            self._header, self.alignment = struct.Struct('>4s4xQ'), 8
+        elif magic == 'FOR4':
+            self._header, self.alignment = struct.Struct('>4sL'), 4
+        else:
+            self.close()
+            raise ValueError('%s is not an IFF file' % path)
+
+    def _size(self):
+        if self._data is not None:
+            return len(self._data)
+        self._file.seek(0, 2)
+        return self._file.tell()
+
+    def close(self):
+        if self._data is not None:
+            self._data.close()
+            self._data = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def read(self, offset, size):
+        if self._data is not None:
+            return self._data[offset:offset + size]
+        self._file.seek(offset)
+        return self._file.read(size)
+
+    def data(self, chunk):
+        return self.read(chunk.offset, chunk.size)
+
+    def _align(self, offset):
+        return (offset + self.alignment - 1) // self.alignment * self.alignment
+
+    def chunks(self, parent=None):
+        ''' the child chunks of a group chunk, or the top level chunks of the
+        file, read lazily one header at a time
+        :return: generator of IffChunk'''
+        if parent is None:
+            offset, end = 0, self.size
+        else:
+            offset, end = self._align(parent.offset + 4), parent.end
+        while offset + self._header.size <= end:
+            tag, size = self._header.unpack(
+                    self.read(offset, self._header.size))
+            offset += self._header.size
+            form = None
+            if tag in self.group_tags:
+                form = self.read(offset, 4)
+            chunk = IffChunk(tag, offset, min(size, end - offset), form)
+            yield chunk
+            offset = self._align(offset + size)
+
+    def walk(self, parent=None, descend=lambda chunk: True):
+        ''' all chunks below parent depth first, group chunks are only
+        entered if descend returns True for them
+        :return: generator of IffChunk'''
+        for chunk in self.chunks(parent):
+            yield chunk
+            if chunk.form is not None and descend(chunk):
+                for child in self.walk(chunk, descend):
+                    yield child
+
+
+class MayaBinaryReader(SceneReader):
+    ''' Reads the top level references, file info, required plugins and the
+    string attributes of texture nodes of a mayaBinary scene.
+
+    Nodes are group chunks which start with a CREA chunk naming the node,
+    their form type is the type id of the node. String attributes are STR
+    chunks holding the attribute name, a flags byte and the value. Only the
+    nodes whose type id is known are read, node_type_ids holds the ids of
+    the builtin texture types and the ids of plugin types, e.g. of redshift,
+    are looked up from maya when it can be imported. Nodes of unknown types
+    are skipped, like the .ma reader skips nodes of unregistered types.
+
+    FREF chunks hold the reference path as the last of their strings and the
+    reference node after a -rfn flag if present, references without one are
+    keyed by their path '''
+
+    node_type_ids = {'RTFT': 'file'}
+
+    def __init__(self, path, texture_attrs=None):
+        super(MayaBinaryReader, self).__init__(path, texture_attrs)
+        self.file_info = []
+        self.plugins = []
+        self._type_ids = self.type_ids(self.texture_attrs)
+
+    @classmethod
+    def type_ids(cls, node_types):
+        ''' form types of node_types, ids which are not in node_type_ids are
+        looked up from maya if it can be imported and knows the type
+        :return: {form type: node type}'''
+        ids = dict((type_id, node_type) for type_id, node_type
+                   in cls.node_type_ids.items() if node_type in node_types)
+        missing = set(node_types).difference(ids.values())
+        if not missing:
+            return ids
+        try:
+            import maya.api.OpenMaya as om
+        except ImportError:
+            return ids
+        for node_type in missing:
+            try:
+                type_id = om.MNodeClass(node_type).typeId.id()
+            except Exception:
+                continue
+            ids[struct.pack('>L', type_id & 0xffffffff)] = node_type
+        return ids
+
+    @staticmethod
+    def _strings(data):
+        return data.rstrip('\0').split('\0')
+
+    def _node(self, iff, group):
+        node_type = self._type_ids.get(group.form)
+        if node_type is None:
+            return
+        attrs = self.texture_attrs[node_type]
+        name = None
+        for chunk in iff.chunks(group):
+            if chunk.tag == 'CREA':
+                # a flags byte, the node name and its parent
+                name = self._strings(iff.data(chunk)[1:])[0]
+            elif chunk.tag == 'STR ':
+                attr, _, rest = iff.data(chunk).partition('\0')
+                if attr.lstrip('.') in attrs:
+                    self.textures.append(
+                            (node_type, name, rest[1:].partition('\0')[0]))
+
+    def _reference(self, data):
+        strings = self._strings(data)
+        ref_node = None
+        if '-rfn' in strings[:-1]:
+            ref_node = strings[strings.index('-rfn') + 1]
+        self.references[ref_node or strings[-1]] = strings[-1]
+
+    def _read(self):
+        del self.file_info[:]
+        del self.plugins[:]
+        with IffReader(self.path) as iff:
+            for chunk in self._chunks(iff):
+                if chunk.tag == 'FREF':
+                    self._reference(iff.data(chunk))
+                elif chunk.tag == 'FINF':
+                    self.file_info.append(
+                            tuple(self._strings(iff.data(chunk))[:2]))
+                elif chunk.tag == 'PLUG':
+                    self.plugins.append(
+                            tuple(self._strings(iff.data(chunk))[:2]))
+                elif chunk.form is not None and chunk.form not in (
+                        'Maya', 'HEAD'):
+                    self._node(iff, chunk)
+
+    @staticmethod
+    def _chunks(iff):
+        ''' chunks of the Maya form and of its header, node groups are
+        handed over whole and read by _node '''
+        return iff.walk(descend=lambda chunk: chunk.form in ('Maya', 'HEAD'))
@@ -0,0 +1,153 @@
+'''Contains a resolver for the nested references of scene files which does
+not need maya'''
+
+import os
+import os.path as op
+import re
+import threading
+from multiprocessing.pool import ThreadPool
+
+
+__all__ = ['ReferenceGraph', 'reference_closure']
+
+
+class ReferenceGraph(object):
+    ''' Nested references of scene files read with the offline readers.
+
+    The references of every file are cached by path and mtime, so a graph
+    shared between many root scenes reads every file only once until it is
+    modified. Files are read level by level over a pool of threads.
+
+    Reference paths are normalized, environment variables are expanded,
+    copy numbers are dropped and relative paths are taken relative to the
+    referencing file. References to files which do not exist or cannot be
+    read are kept as leaves and listed in missing, references which lead
+    back to a file that references them are listed in cycles '''
+
+    workers = 8
+    _copy_number_re = re.compile(r'\{\d+\}$')
+
+    def __init__(self, workers=None):
+        if workers is not None:
+            self.workers = max(1, int(workers))
+        self._cache = {}
+        self._lock = threading.Lock()
+        self.missing = set()
+        self.cycles = []
+
+    @staticmethod
+    def key(path):
+        return op.normcase(op.normpath(path))
+
+    def resolve_path(self, path, parent):
+        path = op.expandvars(self._copy_number_re.sub('', path))
+        if not op.isabs(path):
+            path = op.join(op.dirname(parent), path)
+        return op.normpath(path)
+
+    def references(self, path):
+        ''' paths of the top level references of the scene at path
+        :return: list of paths, None if the file cannot be read'''
+        from . import scene_reader
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return None
+        key = self.key(path)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        try:
+            refs = scene_reader(path, texture_attrs={}).read().references
+        except (ValueError, EnvironmentError, KeyError):
+            refs = None
+        else:
+            refs = sorted(set(self.resolve_path(ref, path)
+                              for ref in refs.values()))
+        with self._lock:
+            self._cache[key] = (mtime, refs)
+        return refs
+
+    def _read_all(self, paths):
+        if len(paths) < 2:
+            return map(self.references, paths)
+        pool = ThreadPool(min(self.workers, len(paths)))
+        try:
+            return pool.map(self.references, paths)
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def edges(self, roots):
+        ''' read roots and everything they reference, one level at a time
+        :return: {path: list of referenced paths} for all files reached'''
+        if isinstance(roots, basestring):
+            roots = [roots]
+        graph = {}
+        level = [op.normpath(root) for root in roots]
+        seen = set(self.key(path) for path in level)
+        while level:
+            for path, refs in zip(level, self._read_all(level)):
+                if refs is None:
+                    self.missing.add(path)
+                graph[path] = refs or []
+            next_level = []
+            for path in level:
+                for ref in graph[path]:
+                    if self.key(ref) not in seen:
+                        seen.add(self.key(ref))
+                        next_level.append(ref)
+            level = next_level
+        return graph
+
+    def _find_cycles(self, graph, roots):
+        cycles, done = [], set()
+        for root in roots:
+            stack, path = [(root, iter(graph.get(root, [])))], [root]
+            on_path = set([self.key(root)])
+            while stack:
+                node, children = stack[-1]
+                for child in children:
+                    key = self.key(child)
+                    if key in on_path:
+                        keys = [self.key(_path) for _path in path]
+                        cycles.append(path[keys.index(key):] + [child])
+                    elif key not in done:
+                        stack.append((child, iter(graph.get(child, []))))
+                        path.append(child)
+                        on_path.add(key)
+                        break
+                else:
+                    stack.pop()
+                    path.pop()
+                    on_path.discard(self.key(node))
+                    done.add(self.key(node))
+        return cycles
+
+    def resolve(self, roots):
+        ''' the references of roots and of everything they reference. missing
+        and cycles are filled for this call
+        :return: {path: list of referenced paths}'''
+        if isinstance(roots, basestring):
+            roots = [roots]
+        self.missing = set()
+        graph = self.edges(roots)
+        self.cycles = self._find_cycles(
+                graph, [op.normpath(root) for root in roots])
+        return graph
+
+    def closure(self, root):
+        ''':return: sorted paths of all files root depends on'''
+        graph = self.resolve(root)
+        root_key = self.key(root)
+        return sorted(path for path in graph if self.key(path) != root_key)
+
+
+_graph = ReferenceGraph()
+
+
+def reference_closure(root):
+    '''all files a scene depends on through nested references, read without
+    maya. Files are cached between calls until they are modified
+    :return: sorted list of paths'''
+    return _graph.closure(root)
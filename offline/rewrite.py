@@ -0,0 +1,166 @@
+'''Contains a streaming rewriter for the texture and reference paths of
+mayaAscii scenes which does not need maya'''
+
+import os
+import os.path as op
+import re
+import logging
+import multiprocessing
+
+from .base import registered_texture_attrs
+from .mayaascii import MayaAsciiReader
+
+
+logger = logging.getLogger(__name__)
+__all__ = ['MayaAsciiRewriter', 'rewrite_scene', 'rewrite_scenes']
+
+
+class MayaAsciiRewriter(MayaAsciiReader):
+    ''' Copies a mayaAscii scene line by line while replacing the paths of
+    references and of texture nodes found in a mapping, e.g. a PathMapping
+    whose token keys match the concrete paths of the scene.
+
+    Only the statements which hold such paths are kept in memory, all other
+    lines are written as they are read. The new scene is written next to
+    its destination and moved over it once complete. Each replacement is
+    reported as (node, old path, new path), node being the reference node
+    for references. Statements which set a path of the mapping but cannot be
+    rewritten are logged and listed in skipped as (node, statement) '''
+
+    _concat = r'(?:%s\s*\+\s*)*%s' % (MayaAsciiReader._string,
+                                      MayaAsciiReader._string)
+    _value_re = re.compile(r'(\(\s*%s\s*\)|%s)(\s*;\s*)$' % (_concat,
+                                                               _concat))
+    _copy_number_re = re.compile(r'\{\d+\}$')
+
+    def __init__(self, path, mapping, texture_attrs=None):
+        super(MayaAsciiRewriter, self).__init__(path, texture_attrs)
+        self.mapping = mapping
+        self.replacements = []
+        self.skipped = []
+
+    @staticmethod
+    def quote(value):
+        return '"%s"' % value.replace('\\', '\\\\').replace('"', '\\"')
+
+    def _target(self, tokens):
+        ''' whether the statement sets a path and the node it sets it of '''
+        command = tokens[0]
+        if command == 'file' and (set(tokens).intersection(
+                ('-r', '-reference', '-rdi', '-referenceDepthInfo'))):
+            return True, self._flag(tokens, '-rfn', '-referenceNode')
+        if command == 'setAttr' and self._node is not None:
+            return True, self._node[1]
+        return False, None
+
+    def _skip(self, node, statement):
+        logger.warning('Cannot rewrite the path of %s in %s: %s' % (
+            node, self.path, statement.strip()))
+        self.skipped.append((node, statement))
+        return statement
+
+    def _rewrite(self, statement):
+        tokens = self.tokens(statement)
+        sets_path, node = self._target(tokens)
+        self._statement(tokens)
+        if not sets_path:
+            return statement
+        old = tokens[-1]
+        copy_number = self._copy_number_re.search(old)
+        path = old[:copy_number.start()] if copy_number else old
+        if path not in self.mapping:
+            return statement
+        new = self.mapping[path] + (copy_number.group() if copy_number
+                                    else '')
+        if new == old:
+            return statement
+        match = self._value_re.search(statement)
+        if match is None or (tokens[0] == 'setAttr' and self._flag(
+                tokens, '-type', '-typ') != 'string'):
+            return self._skip(node, statement)
+        self.replacements.append((node, old, new))
+        return (statement[:match.start(1)] + self.quote(new) +
+                statement[match.end(1):])
+
+    def rewrite(self, dest=None):
+        ''' write the scene with its paths replaced to dest, or over itself
+        :return: list of (node, old path, new path)'''
+        dest = dest or self.path
+        part = dest + '.part'
+        self.references.clear()
+        del self.textures[:]
+        del self.replacements[:]
+        del self.skipped[:]
+        self._reset()
+        try:
+            with open(self.path, 'rb') as scene, open(part, 'wb') as out:
+                statement = []
+                for line, keep, end in self.lines(scene):
+                    if not keep:
+                        out.write(line)
+                        continue
+                    statement.append(line)
+                    if end:
+                        out.write(self._rewrite(''.join(statement)))
+                        statement = []
+        except:
+            if op.exists(part):
+                os.remove(part)
+            raise
+        if os.name == 'nt' and op.exists(dest):
+            os.remove(dest)
+        os.rename(part, dest)
+        return self.replacements[:]
+
+
+def rewrite_scene(path, mapping, dest=None, texture_attrs=None):
+    '''replace the texture and reference paths of a mayaAscii scene found in
+    mapping without opening it in maya
+    :return: list of (node, old path, new path)'''
+    return MayaAsciiRewriter(path, mapping,
+                             texture_attrs=texture_attrs).rewrite(dest)
+
+
+_job_options = {}
+
+
+def _init_rewrite_worker(mapping, texture_attrs):
+    ''' keeps the options shared by all jobs so that they are sent to each
+    worker once rather than with every job '''
+    _job_options.update(mapping=mapping, texture_attrs=texture_attrs)
+
+
+def _rewrite_job(args):
+    path, dest = args
+    try:
+        rewriter = MayaAsciiRewriter(path, _job_options['mapping'],
+                                     _job_options['texture_attrs'])
+        replacements = rewriter.rewrite(dest)
+    except (EnvironmentError, ValueError) as e:
+        return path, None, str(e)
+    error = None
+    if rewriter.skipped:
+        error = 'Cannot rewrite the path of %s' % ', '.join(
+                sorted(set(str(node) for node, _ in rewriter.skipped)))
+    return path, replacements, error
+
+
+def rewrite_scenes(scenes, mapping, processes=None):
+    '''rewrite many mayaAscii scenes over a pool of processes, scenes are
+    paths which are rewritten in place or (path, dest) pairs
+    :return: generator of (path, replacements, error) in order of completion,
+    replacements is None and error the message if a scene failed, error
+    names the nodes whose paths could not be rewritten otherwise'''
+    jobs = []
+    for scene in scenes:
+        path, dest = (scene, None) if isinstance(scene, basestring) else scene
+        jobs.append((path, dest))
+    pool = multiprocessing.Pool(
+            processes, initializer=_init_rewrite_worker,
+            initargs=(mapping, registered_texture_attrs()))
+    try:
+        for result in pool.imap_unordered(_rewrite_job, jobs):
+            yield result
+    finally:
+        pool.terminate()
+        pool.join()
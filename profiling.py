@@ -0,0 +1,296 @@
+'''Contains instrumentation which reports where the startup time of imaya
+goes: the import of every module and the first call of every public
+function, with the memory they allocate'''
+
+import gc
+import imp
+import sys
+import json
+import time
+import types
+import functools
+import threading
+import importlib
+import traceback
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+__all__ = ['ImportProfiler', 'FirstCallProfiler', 'install_stand_ins',
+           'profile']
+
+package = __package__ or __name__.rpartition('.')[0]
+
+
+class _Allocations(object):
+    ''' memory allocated between two points, traced bytes where tracemalloc
+    is available and the change in the number of gc tracked objects
+    otherwise '''
+
+    unit = 'bytes' if tracemalloc is not None else 'objects'
+
+    @staticmethod
+    def start():
+        if tracemalloc is not None and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @staticmethod
+    def current():
+        if tracemalloc is not None:
+            return tracemalloc.get_traced_memory()[0]
+        return len(gc.get_objects())
+
+
+class ImportProfiler(object):
+    ''' A meta path hook which times the import of modules whose names start
+    with one of prefixes. Each import is recorded with its total wall time
+    and allocations and with its own share, excluding the imports it made '''
+
+    def __init__(self, prefixes=(package, 'pymel', 'maya', 'iutil')):
+        self.prefixes = tuple(prefixes)
+        self.records = []
+        self._loading = set()
+        self._stack = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def start(self):
+        _Allocations.start()
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def stop(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def _wanted(self, fullname):
+        return any(fullname == prefix or fullname.startswith(prefix + '.')
+                   for prefix in self.prefixes)
+
+    def find_module(self, fullname, path=None):
+        if fullname in self._loading or not self._wanted(fullname):
+            return None
+        try:
+            imp.find_module(fullname.rpartition('.')[2], path)
+        except ImportError:
+            return None
+        return self
+
+    def load_module(self, fullname):
+        self._loading.add(fullname)
+        frame = [fullname, time.time(), _Allocations.current(), 0.0, 0]
+        self._stack.append(frame)
+        try:
+            __import__(fullname)
+        finally:
+            self._loading.discard(fullname)
+            self._stack.pop()
+            wall = time.time() - frame[1]
+            allocated = _Allocations.current() - frame[2]
+            self.records.append({
+                'module': fullname, 'wall': wall, 'self_wall': wall - frame[3],
+                'allocated': allocated, 'self_allocated': allocated - frame[4],
+                'depth': len(self._stack)})
+            if self._stack:
+                self._stack[-1][3] += wall
+                self._stack[-1][4] += allocated
+        return sys.modules[fullname]
+
+
+class FirstCallProfiler(object):
+    ''' Wraps the public functions of modules so that the wall time and
+    allocations of their first call are recorded, later calls go straight
+    through. The functions are also replaced where the package or its other
+    modules hold them under their names, e.g. names the lazy package has
+    looked up or star imports. restore, or leaving the context, puts the
+    original functions back '''
+
+    def __init__(self):
+        self.records = []
+        self._called = set()
+        self._lock = threading.Lock()
+        self._replaced = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.restore()
+
+    def _wrap(self, name, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if name in self._called:
+                return func(*args, **kwargs)
+            with self._lock:
+                self._called.add(name)
+            start, allocations = time.time(), _Allocations.current()
+            error = None
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                error = '%s: %s' % (type(e).__name__, e)
+                raise
+            finally:
+                self.records.append({
+                    'function': name, 'wall': time.time() - start,
+                    'allocated': _Allocations.current() - allocations,
+                    'error': error})
+        return wrapper
+
+    def instrument(self, module):
+        ''' wrap the public functions defined in module
+        :return: number of functions wrapped'''
+        _Allocations.start()
+        wrappers = {}
+        for attr, value in vars(module).items():
+            if (attr.startswith('_') or
+                    not isinstance(value, types.FunctionType) or
+                    value.__module__ != module.__name__):
+                continue
+            wrappers[id(value)] = (value, self._wrap(
+                '%s.%s' % (module.__name__, attr), value))
+        if not wrappers:
+            return 0
+
+        holders = [holder for name, holder in sys.modules.items()
+                   if holder is not None and (
+                       name == package or name.startswith(package + '.'))]
+        if module not in holders:
+            holders.append(module)
+        for holder in holders:
+            for attr, value in vars(holder).items():
+                if id(value) in wrappers and wrappers[id(value)][0] is value:
+                    setattr(holder, attr, wrappers[id(value)][1])
+                    self._replaced.append((holder, attr, value))
+        return len(wrappers)
+
+    def restore(self):
+        ''' put back the functions replaced by instrument '''
+        while self._replaced:
+            holder, attr, value = self._replaced.pop()
+            setattr(holder, attr, value)
+
+
+class _StandIn(types.ModuleType):
+    ''' a module whose every attribute is a stand-in which can be called,
+    subscripted and whose attributes are stand-ins again '''
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return _StandInObject()
+
+
+class _StandInObject(object):
+
+    def __call__(self, *args, **kwargs):
+        return _StandInObject()
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return _StandInObject()
+
+    def __getitem__(self, key):
+        return _StandInObject()
+
+    def __iter__(self):
+        return iter([])
+
+    def __nonzero__(self):
+        return False
+
+
+def install_stand_ins(names=('maya', 'maya.cmds', 'maya.mel',
+                             'maya.OpenMaya', 'maya.standalone', 'pymel',
+                             'pymel.core', 'iutil')):
+    ''' put stand-in modules for maya, pymel and iutil into sys.modules so
+    that the package can be imported and profiled where they are not
+    installed, e.g. in CI. Modules which can be imported are left alone
+    :return: names of the modules stood in for'''
+    installed = []
+    for name in names:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+        else:
+            continue
+        module = sys.modules[name] = _StandIn(name)
+        parent, _, child = name.rpartition('.')
+        if parent:
+            setattr(sys.modules[parent], child, module)
+        installed.append(name)
+    return installed
+
+
+def profile(submodules=None, calls=(), stand_ins=False):
+    ''' import the submodules of the package, all by default, with their
+    imports timed, then instrument their public functions and call the
+    functions named in calls with no arguments. The functions are restored
+    afterwards, calls which fail are listed in call_errors of the report
+    :return: report as a dict which can be dumped as json'''
+    root = importlib.import_module(package)
+    if submodules is None:
+        submodules = [name for name in getattr(root, '_submodules', [])
+                      if name != 'profiling']
+    report = {'python': sys.version.split()[0],
+              'allocation_unit': _Allocations.unit,
+              'stand_ins': install_stand_ins() if stand_ins else []}
+
+    start = time.time()
+    with ImportProfiler() as imports:
+        modules = [importlib.import_module('%s.%s' % (package, name))
+                   for name in submodules]
+    report['import_wall'] = time.time() - start
+    report['imports'] = imports.records
+
+    report['call_errors'] = []
+    with FirstCallProfiler() as first_calls:
+        for module in modules:
+            first_calls.instrument(module)
+        for name in calls:
+            module_name, _, attr = name.rpartition('.')
+            try:
+                module = importlib.import_module(
+                        '%s.%s' % (package, module_name) if module_name
+                        else package)
+                getattr(module, attr)()
+            except Exception as e:
+                report['call_errors'].append({
+                    'call': name, 'error': '%s: %s' % (type(e).__name__, e),
+                    'traceback': traceback.format_exc()})
+    report['calls'] = first_calls.records
+    return report
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(
+            description='Report import and first call times of imaya')
+    parser.add_argument('--stand-ins', action='store_true',
+                        help='stand in for maya, pymel and iutil if not '
+                        'installed')
+    parser.add_argument('--module', action='append', default=None,
+                        help='submodule to import, all by default')
+    parser.add_argument('--call', action='append', default=[],
+                        help='module.function to call with no arguments')
+    parser.add_argument('--output', default=None,
+                        help='file to write the json report to')
+    options = parser.parse_args()
+    result = profile(submodules=options.module, calls=options.call,
+                     stand_ins=options.stand_ins)
+    if options.output:
+        with open(options.output, 'w') as report_file:
+            json.dump(result, report_file, indent=2)
+    else:
+        json.dump(result, sys.stdout, indent=2)
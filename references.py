@@ -1,14 +1,24 @@
 '''Contains all functions related to references'''
 import os
+import time
 import re
+import logging
 import os.path as op
 
 import pymel.core as pc
 import maya.cmds as cmds
+import maya.OpenMaya as om
 
-import iutil as util
+try:
+    import iutil as util
+except:
+    pass
 
-from .utils import newScene, newcomerObjs
+from .utils import (newScene, newcomerObjs, suspendRefresh,
+                    suspendViewport, suspendEvaluation)
+
+
+logger = logging.getLogger(__name__)
 
 
 def getReferences(loaded=False, unloaded=False):
@@ -48,15 +58,95 @@ def getCombinedMesh(ref):
     return meshes
 
 
+class ReferencePathIndex(object):
+    ''' Normalized paths of the top level references of the scene.
+
+    The index is built on the first query and kept until a scene message
+    tells that references may have changed. Normalized paths are remembered
+    by their raw path so that rebuilding the index only normalizes paths it
+    has not seen before, until another scene is opened. Without callbacks
+    the index is built for every query '''
+
+    _reset_messages = ('kAfterOpen', 'kAfterNew')
+    _change_messages = ('kAfterImport', 'kAfterLoadReference',
+                        'kAfterUnloadReference', 'kAfterCreateReference',
+                        'kAfterRemoveReference', 'kAfterImportReference')
+
+    def __init__(self):
+        self._paths = None
+        self._normalized = {}
+        self._callbacks = []
+
+    @property
+    def active(self):
+        return bool(self._callbacks)
+
+    def start(self):
+        if self.active:
+            return
+        try:
+            for message in self._reset_messages:
+                self._callbacks.append(om.MSceneMessage.addCallback(
+                    getattr(om.MSceneMessage, message), self._reset))
+            for message in self._change_messages:
+                self._callbacks.append(om.MSceneMessage.addCallback(
+                    getattr(om.MSceneMessage, message), self.invalidate))
+        except (RuntimeError, AttributeError):
+            self.stop()
+
+    def stop(self):
+        for callback in self._callbacks:
+            om.MMessage.removeCallback(callback)
+        self._callbacks = []
+        self._reset()
+
+    def invalidate(self, *args):
+        self._paths = None
+
+    def _reset(self, *args):
+        self._paths = None
+        self._normalized.clear()
+
+    def normpath(self, path):
+        normalized = self._normalized.get(path)
+        if normalized is None:
+            normalized = self._normalized[path] = util.normpath(path)
+        return normalized
+
+    def paths(self):
+        ''':return: set of the normalized reference paths'''
+        self.start()
+        if self._paths is None or not self.active:
+            self._paths = set(self.normpath(path)
+                              for path in cmds.file(r=True, q=True) or [])
+        return self._paths
+
+    def exist(self, paths):
+        ''':return: list of whether each of paths is referenced'''
+        exists = self.paths()
+        return [util.normpath(path) in exists for path in paths]
+
+
+try:
+    # a reloaded module drops the callbacks of its previous index
+    _index.stop()
+except NameError:
+    pass
+_index = ReferencePathIndex()
+
+
 def referenceExists(path):
-    # get the existing references
-    exists = cmds.file(r=True, q=True)
-    exists = [util.normpath(x) for x in exists]
-    path = util.normpath(path)
-    if path in exists:
+    if _index.exist([path])[0]:
         return True
 
 
+def referencesExist(paths):
+    '''whether each of paths is referenced at the top level of the scene,
+    answered from one index of the references
+    :return: list of bool'''
+    return _index.exist(paths)
+
+
 def get_reference_paths():
     '''
     Query all the top-level reference nodes in a file or in the currently open
@@ -95,10 +185,8 @@ def addReference(paths=[], dup=True, stripVersionInNamespace=True, *arg,
         cmds.file(path, r=True, mnc=False, namespace=namespace)
 
 
-def createReference(path, stripVersionInNamespace=True):
-    if not path or not op.exists(path):
-        return None
-    before = pc.listReferences()
+def referenceNamespace(path, stripVersionInNamespace=True):
+    ''':return: the namespace a reference to path is given'''
     namespace = op.basename(path)
     namespace = op.splitext(namespace)[0]
     if stripVersionInNamespace:
@@ -106,33 +194,165 @@ def createReference(path, stripVersionInNamespace=True):
         match = re.match('(.*)([-._]v\d+)(.*)', namespace)
         if match:
             namespace = match.group(1) + match.group(3)
-    pc.createReference(path, namespace=namespace, mnc=False)
-    after = pc.listReferences()
-    new = [ref for ref in after if ref not in before and not
-           ref.refNode.isReferenced()]
-    return new[0]
+    return namespace
 
 
-def removeAllReferences():
-    refNodes = pc.ls(type=pc.nt.Reference)
-    refs = []
-    for node in refNodes:
-        if not node.referenceFile():
-            continue
+def _uniqueNamespaces(namespaces):
+    ''':return: namespaces with a number appended to those which exist in
+    the scene or come earlier in the list, as maya does on a clash'''
+    taken = set(name.lstrip(':') for name in cmds.namespaceInfo(
+        ':', listOnlyNamespaces=True) or [])
+    unique = []
+    for namespace in namespaces:
+        name, number = namespace, 0
+        while name in taken:
+            number += 1
+            name = '%s%d' % (namespace, number)
+        taken.add(name)
+        unique.append(name)
+    return unique
+
+
+def createReferences(paths, stripVersionInNamespace=True, load=True):
+    '''
+    create references to all paths in one pass. Namespaces are resolved
+    before any reference is created and the references are created
+    unloaded, then loaded one after the other. While they are created and
+    loaded the refresh of the viewports is suspended, viewport 2.0 is paused
+    and the evaluation manager is switched to DG evaluation, so the
+    evaluation graph is rebuilt once instead of after every reference
+
+    @params:
+            paths: paths of the files to reference
+            load: load the references, otherwise they are left unloaded
+    @return: list of FileReference in the order of paths, None for paths
+    which do not exist
+    '''
+    refs = [None] * len(paths)
+    existing = [index for index, path in enumerate(paths)
+                if path and op.exists(path)]
+    namespaces = _uniqueNamespaces(
+            [referenceNamespace(paths[index], stripVersionInNamespace)
+             for index in existing])
+    if not existing:
+        return refs
+    with suspendRefresh(), suspendViewport(), suspendEvaluation():
+        for index, namespace in zip(existing, namespaces):
+            refs[index] = pc.FileReference(cmds.file(
+                paths[index], r=True, deferReference=True, mnc=False,
+                namespace=namespace))
+        if load:
+            for index in existing:
+                cmds.file(loadReference=str(refs[index].refNode))
+    return refs
+
+
+def createReference(path, stripVersionInNamespace=True):
+    return createReferences([path], stripVersionInNamespace)[0]
+
+
+def _referenceParents(nodes):
+    ''':return: {reference node: parent reference node or None} of the
+    reference nodes which have a file'''
+    parents = {}
+    for node in nodes:
         try:
-            refs.append(pc.FileReference(node))
-        except:
-            pass
+            cmds.referenceQuery(node, filename=True)
+        except RuntimeError:
+            # shared and unknown reference nodes
+            continue
+        parents[node] = cmds.referenceQuery(node, referenceNode=True,
+                                            parent=True)
+    return parents
+
 
-    while refs:
+def _referenceDepths(parents):
+    ''':return: {reference node: number of references above it}, parents
+    is completed with the ancestors of its nodes'''
+    depths = {}
+    for node in list(parents):
+        chain = []
+        while node is not None and node not in depths:
+            chain.append(node)
+            if node not in parents:
+                parents[node] = cmds.referenceQuery(
+                        node, referenceNode=True, parent=True)
+            node = parents[node]
+        depth = -1 if node is None else depths[node]
+        for node in reversed(chain):
+            depth += 1
+            depths[node] = depth
+    return depths
+
+
+def removeReferences(refs=None):
+    '''
+    remove references with their edits, all references of the scene by
+    default. References are ordered by their nesting once and only those
+    whose parent is not removed as well are removed, nested references go
+    with them. All of them are unloaded, then their edits are removed, then
+    they are removed, with the refresh of the viewports suspended
+
+    @params:
+            refs: FileReferences or reference nodes
+    @return: list of (reference node, path, seconds spent on it, error or
+    None) in the order of removal, a reference with an error is left as far
+    as it was removed when the error occurred
+    '''
+    if refs is None:
+        nodes = cmds.ls(type='reference') or []
+    else:
+        nodes = [str(getattr(ref, 'refNode', ref)) for ref in refs]
+    parents = _referenceParents(nodes)
+    removing = set(parents)
+    depths = _referenceDepths(parents)
+
+    roots = []
+    for node in sorted(removing, key=lambda node: (depths[node], node)):
+        parent = parents[node]
+        while parent is not None and parent not in removing:
+            parent = parents.get(parent)
+        if parent is None:
+            roots.append(node)
+
+    paths = dict((node, cmds.referenceQuery(node, filename=True))
+                 for node in roots)
+    seconds = dict((node, 0.0) for node in roots)
+    errors = {}
+
+    def step(node, func):
+        if node in errors:
+            return
+        start = time.time()
         try:
-            ref = refs.pop()
-            if ref.parent() is None:
-                removeReference(ref)
-            else:
-                refs.insert(0, ref)
-        except Exception as e:
-            print 'Error removing reference: ', str(e)
+            func(node)
+        except RuntimeError as e:
+            errors[node] = str(e)
+            logger.warning('Error removing reference %s: %s' % (node, e))
+        finally:
+            seconds[node] += time.time() - start
+
+    def unload(node):
+        if cmds.referenceQuery(node, isLoaded=True):
+            cmds.file(unloadReference=node)
+
+    def removeEdits(node):
+        cmds.referenceEdit(node, removeEdits=True, failedEdits=True,
+                           successfulEdits=True)
+
+    def remove(node):
+        cmds.file(removeReference=True, referenceNode=node)
+
+    with suspendRefresh():
+        for func in (unload, removeEdits, remove):
+            for node in roots:
+                step(node, func)
+    return [(node, paths[node], seconds[node], errors.get(node))
+            for node in roots]
+
+
+def removeAllReferences():
+    return removeReferences()
 
 
 def removeReference(ref):
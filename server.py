@@ -0,0 +1,251 @@
+'''Contains a long lived worker server which keeps a maya session warm for
+jobs sent to it from other processes, and a pool of such servers'''
+
+import os
+import Queue
+import logging
+import threading
+import traceback
+import multiprocessing
+from multiprocessing.connection import Listener, Client
+from multiprocessing.pool import ThreadPool
+
+from .batch import MayaWorker, BatchResult, plain
+from .exceptions import WorkerError
+
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerServer(object):
+    ''' Serves jobs from one worker which is set up once, e.g. a MayaWorker
+    whose maya session, plugins and imported imaya stay loaded between jobs.
+
+    Clients connect to address with authkey and send
+    (scene, operation, args, kwargs) for each job, every job is answered
+    with (status, result, error). The worker starts a new scene after every
+    job. A client sends None to disconnect and 'shutdown' to stop the
+    server. Connections are served one at a time.
+
+    Jobs are unpickled and run, so an authkey is required and only clients
+    which know it are served '''
+
+    def __init__(self, address=('localhost', 0), authkey=None,
+                 worker=None):
+        if not authkey:
+            raise ValueError('WorkerServer needs an authkey')
+        self.worker = worker if worker is not None else MayaWorker()
+        self.listener = Listener(address, authkey=authkey)
+        self._running = False
+
+    @property
+    def address(self):
+        return self.listener.address
+
+    def handle(self, job):
+        try:
+            return 'ok', plain(self.worker.run(*job)), None
+        except Exception:
+            return 'error', None, traceback.format_exc()
+
+    def _serve_connection(self, conn):
+        try:
+            while True:
+                try:
+                    job = conn.recv()
+                except (IOError, EOFError):
+                    return
+                if job is None:
+                    return
+                if job == 'shutdown':
+                    self._running = False
+                    return
+                conn.send(self.handle(job))
+        finally:
+            conn.close()
+
+    def serve_forever(self):
+        self.worker.setup()
+        self._running = True
+        logger.info('Serving on %s' % (self.address,))
+        try:
+            while self._running:
+                try:
+                    conn = self.listener.accept()
+                except (IOError, EOFError):
+                    continue
+                self._serve_connection(conn)
+        finally:
+            self.listener.close()
+
+
+class WorkerClient(object):
+    ''' A connection to a WorkerServer '''
+
+    def __init__(self, address, authkey=None):
+        self.address = address
+        self.conn = Client(address, authkey=authkey)
+
+    def submit(self, scene, operation, *args, **kwargs):
+        ''':return: (status, result, error) of the job'''
+        self.conn.send((scene, operation, args, kwargs))
+        return self.conn.recv()
+
+    def run(self, scene, operation, *args, **kwargs):
+        ''' open scene in the server, run the imaya operation on it and
+        return its result
+        :raises WorkerError: with the traceback if the operation failed'''
+        status, result, error = self.submit(scene, operation, *args,
+                                            **kwargs)
+        if status != 'ok':
+            raise WorkerError(obj='%s on %s' % (
+                getattr(operation, '__name__', operation), scene),
+                traceback=error)
+        return result
+
+    def shutdown(self):
+        self.conn.send('shutdown')
+        self.close()
+
+    def close(self):
+        try:
+            self.conn.send(None)
+        except (IOError, EOFError):
+            pass
+        self.conn.close()
+
+
+def _serve(conn, worker, authkey):
+    server = WorkerServer(authkey=authkey, worker=worker)
+    conn.send(server.address)
+    conn.close()
+    server.serve_forever()
+
+
+class WorkerPool(object):
+    ''' A pool of WorkerServer processes, each set up once and reused for
+    every job it takes. Jobs are handed to whichever server is idle. A
+    server which exits is replaced and its job retried up to retries times
+    before it is reported as 'crashed' '''
+
+    def __init__(self, size=4, worker=None, authkey=None, retries=1):
+        if worker is None:
+            worker = MayaWorker()
+        self.worker = worker
+        self.authkey = authkey or multiprocessing.current_process().authkey
+        self.retries = retries
+        self._processes = {}
+        self._idle = Queue.Queue()
+        self._lock = threading.Lock()
+        for _ in range(size):
+            self._idle.put(self._spawn())
+        self.size = size
+
+    def _spawn(self):
+        ''' start a server process
+        :return: a client connected to it'''
+        conn, child_conn = multiprocessing.Pipe()
+        process = multiprocessing.Process(
+                target=_serve, args=(child_conn, self.worker, self.authkey))
+        process.daemon = True
+        process.start()
+        client = WorkerClient(conn.recv(), authkey=self.authkey)
+        with self._lock:
+            self._processes[client] = process
+        return client
+
+    def _replace(self, client):
+        ''' stop the server of a broken client and start another
+        :return: a client of the new server'''
+        try:
+            client.conn.close()
+        except (IOError, EOFError):
+            pass
+        with self._lock:
+            process = self._processes.pop(client, None)
+        if process is not None:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+        return self._spawn()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def submit(self, scene, operation, *args, **kwargs):
+        ''' run a job on the next idle server, waiting for one if all are
+        busy
+        :return: BatchResult'''
+        name = getattr(operation, '__name__', operation)
+        attempts = 0
+        while True:
+            attempts += 1
+            client = self._idle.get()
+            try:
+                status, result, error = client.submit(scene, operation,
+                                                      *args, **kwargs)
+            except (IOError, EOFError):
+                logger.warning('Worker server %s exited, restarting it' %
+                               (client.address,))
+                broken, client = client, None
+                client = self._replace(broken)
+                if attempts <= self.retries:
+                    continue
+                return BatchResult(scene, name, 'crashed', None,
+                                   'worker server exited while running the '
+                                   'job', attempts, None)
+            finally:
+                if client is not None:
+                    self._idle.put(client)
+            return BatchResult(scene, name, status, result, error, attempts,
+                               None)
+
+    def run(self, scenes, operation, *args, **kwargs):
+        ''' run operation on every scene over all servers
+        :return: generator of BatchResult in order of completion'''
+        pool = ThreadPool(self.size)
+        try:
+            for result in pool.imap_unordered(
+                    lambda scene: self.submit(scene, operation, *args,
+                                              **kwargs), scenes):
+                yield result
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def close(self):
+        while not self._idle.empty():
+            client = self._idle.get()
+            try:
+                client.shutdown()
+            except (IOError, EOFError):
+                pass
+        with self._lock:
+            for process in self._processes.values():
+                process.join(5)
+                if process.is_alive():
+                    process.terminate()
+            self._processes = {}
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(
+            description='Serve imaya jobs from a warm maya session')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--authkey', default=None,
+                        help='key clients must know, generated and printed '
+                        'if not given')
+    parser.add_argument('--plugin', action='append', default=[])
+    options = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    authkey = options.authkey
+    if not authkey:
+        authkey = os.urandom(16).encode('hex')
+        print 'authkey: %s' % authkey
+    WorkerServer((options.host, options.port), authkey=authkey,
+                 worker=MayaWorker(plugins=options.plugin)).serve_forever()
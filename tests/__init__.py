@@ -0,0 +1,75 @@
+'''Tests of the parts of imaya which run without maya, run them from the
+root of the package with
+
+    python -m unittest discover -s tests -t .
+'''
+
+import os.path as op
+import imp
+import logging
+import shutil
+import tempfile
+import unittest
+
+try:
+    import imaya
+except ImportError:
+    # the package is checked out under another name
+    imp.load_module('imaya', None, op.dirname(op.dirname(op.abspath(
+        __file__))), ('', '', imp.PKG_DIRECTORY))
+
+logging.getLogger('imaya').addHandler(logging.NullHandler())
+
+
+texture_attrs = {'file': ('ftn', 'fileTextureName')}
+
+# written the way maya 2016 and later write scenes, with a rename -uid after
+# every createNode and long strings split into a parenthesized concatenation
+scene = r'''//Maya ASCII 2018 scene
+//Name: shot.ma
+//Codeset: 1252
+file -rdi 1 -ns "chr" -rfn "chrRN" -op "v=0;" -typ "mayaAscii" "/proj/chr.ma";
+file -r -ns "chr" -dr 1 -rfn "chrRN" -op "v=0;" -typ "mayaAscii" "/proj/chr.ma";
+requires maya "2018";
+currentUnit -l centimeter -a degree -t film;
+fileInfo "application" "maya";
+createNode transform -s -n "persp";
+	rename -uid "5A2E9C40-4B7B-1D7E-5F37-96A2B9B0E6C1";
+	setAttr ".v" no;
+createNode file -n "file1";
+	rename -uid "D1A3B5C7-4E2F-11E8-9A6B-0242AC120002";
+	setAttr ".ftn" -type "string" "/tex/a.png";
+createNode file -n "file2";
+	rename -uid "D1A3B5C7-4E2F-11E8-9A6B-0242AC120003";
+	setAttr ".ftn" -type "string" ("/a/very/long/directory/of/the/textures/"
+		 + "b.png");
+createNode file -n "file3";
+	rename -uid "D1A3B5C7-4E2F-11E8-9A6B-0242AC120004";
+
+	setAttr ".ftn" -type "string" "/tex/c.png";
+createNode file -n "file4";
+	rename -uid "D1A3B5C7-4E2F-11E8-9A6B-0242AC120005";
+	setAttr -k on ".ftn" -type "string" "/tex/d.png";
+createNode file -n "file5";
+	setAttr ".ftn" -type "string" "/tex/\"e\".png";
+createNode place2dTexture -n "place2dTexture1";
+	rename -uid "D1A3B5C7-4E2F-11E8-9A6B-0242AC120006";
+select -ne :defaultRenderGlobals;
+	setAttr ".imfkey" -type "string" "exr";
+// End of shot.ma
+'''
+
+
+class TempDirTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, name, text):
+        path = op.join(self.dir, name)
+        with open(path, 'wb') as f:
+            f.write(text)
+        return path
@@ -0,0 +1,43 @@
+import unittest
+from collections import namedtuple, OrderedDict
+
+from imaya.batch import BatchResult, plain
+
+
+Point = namedtuple('Point', 'x y')
+
+
+class _Node(object):
+
+    def __str__(self):
+        return 'pSphere1'
+
+
+class _Set(set):
+    pass
+
+
+class PlainTest(unittest.TestCase):
+
+    def test_builtins(self):
+        value = {'a': [1, 2.5, (None, True)], 'b': set(['x']), 3: u'c'}
+        self.assertEqual(plain(value), value)
+
+    def test_objects_become_strings(self):
+        self.assertEqual(plain({_Node(): [_Node()]}),
+                         {'pSphere1': ['pSphere1']})
+
+    def test_namedtuples(self):
+        self.assertEqual(plain(Point(_Node(), 2)), Point('pSphere1', 2))
+        result = plain(BatchResult('s.ma', 'op', 'ok', [_Node()], None, 1,
+                                   0.5))
+        self.assertIsInstance(result, BatchResult)
+        self.assertEqual(result.result, ['pSphere1'])
+
+    def test_subclasses(self):
+        self.assertEqual(type(plain(_Set([1]))), set)
+        self.assertEqual(type(plain(OrderedDict(a=1))), dict)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,23 @@
+import os.path as op
+
+from imaya.textures.dedup import find_duplicates, PARTIAL_SIZE
+
+from . import TempDirTestCase
+
+
+class FindDuplicatesTest(TempDirTestCase):
+
+    def test_duplicates(self):
+        big = 'x' * (PARTIAL_SIZE * 3)
+        paths = [op.join(self.dir, name) for name in
+                 ['a.png', 'b.png', 'c.png', 'd.png', 'e.png', 'f.png']]
+        for path, text in zip(paths, ['same', 'same', 'diff',
+                                      big + 'a', big + 'a', 'x' + big]):
+            self.write(op.basename(path), text)
+        missing = op.join(self.dir, 'missing.png')
+        content = find_duplicates(paths + [missing], workers=2)
+        self.assertNotIn(missing, content)
+        self.assertEqual(content[paths[1]], paths[0])
+        self.assertEqual(content[paths[2]], paths[2])
+        self.assertEqual(content[paths[4]], paths[3])
+        self.assertEqual(content[paths[5]], paths[5])
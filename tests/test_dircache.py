@@ -0,0 +1,95 @@
+import os
+import os.path as op
+import unittest
+
+from imaya.textures import dircache
+from imaya.textures.dircache import DirectoryCache
+
+from . import TempDirTestCase
+
+
+class DirectoryCacheTest(TempDirTestCase):
+
+    files = ['tex.1001.exr', 'tex.1002.exr', 'tex.1001.tx', 'tex.u1_v1.png',
+             'tex.u2_v1.png', 'seq.0001.png', 'seq.0002.png', 'other.png']
+
+    def setUp(self):
+        super(DirectoryCacheTest, self).setUp()
+        for name in self.files:
+            self.write(name, '')
+        # directories whose names match the patterns are not files
+        os.mkdir(op.join(self.dir, 'tex.1003.exr'))
+        os.mkdir(op.join(self.dir, 'seq.0003.png'))
+
+    def names(self, paths):
+        return sorted(op.basename(path) for path in paths)
+
+    def check(self):
+        cache = DirectoryCache()
+        self.assertEqual(
+            self.names(cache.get_uv_tiles(op.join(self.dir,
+                                                  'tex.<UDIM>.exr'))),
+            ['tex.1001.exr', 'tex.1002.exr'])
+        self.assertEqual(
+            self.names(cache.get_uv_tiles(op.join(self.dir, 'tex.1002.exr'),
+                                          mode='mari')),
+            ['tex.1001.exr', 'tex.1002.exr'])
+        self.assertEqual(
+            self.names(cache.get_uv_tiles(op.join(self.dir,
+                                                  'tex.<uvtile>.png'))),
+            ['tex.u1_v1.png', 'tex.u2_v1.png'])
+        for mode in ('zbrush', 'mudbox'):
+            self.assertEqual(
+                self.names(cache.get_uv_tiles(
+                    op.join(self.dir, 'tex.u2_v1.png'), mode=mode)),
+                ['tex.u1_v1.png', 'tex.u2_v1.png'])
+        self.assertEqual(
+            cache.get_uv_tiles(op.join(self.dir, 'tex.u2_v1.png')), [])
+        self.assertEqual(
+            self.names(cache.get_sequence_files(op.join(self.dir,
+                                                        'seq.0001.png'))),
+            ['seq.0001.png', 'seq.0002.png'])
+        self.assertEqual(
+            cache.get_file_by_extension(op.join(self.dir, 'tex.1001.exr')),
+            op.join(self.dir, 'tex.1001.tx'))
+        self.assertIsNone(
+            cache.get_file_by_extension(op.join(self.dir, 'tex.1002.exr')))
+        self.assertFalse(cache.is_file(op.join(self.dir, 'tex.1003.exr')))
+
+    def test_scandir(self):
+        if dircache.scandir is None:
+            self.skipTest('scandir is not available')
+        self.check()
+
+    def test_listdir(self):
+        scandir, dircache.scandir = dircache.scandir, None
+        try:
+            self.check()
+        finally:
+            dircache.scandir = scandir
+
+    def test_exists_many(self):
+        cache = DirectoryCache()
+        paths = [op.join(self.dir, name) for name in
+                 ['other.png', 'missing.png', 'tex.1003.exr']]
+        self.assertEqual(cache.exists_many(paths),
+                         dict(zip(paths, [True, False, False])))
+        paths = [op.join(self.dir, name) for name in self.files]
+        self.assertTrue(all(cache.exists_many(paths).values()))
+
+    def test_scan_is_shared(self):
+        with DirectoryCache.scan() as cache:
+            self.assertIs(DirectoryCache.current(), cache)
+            with DirectoryCache.scan() as inner:
+                self.assertIs(inner, cache)
+        self.assertIsNot(DirectoryCache.current(), cache)
+
+    def test_scan_given_cache(self):
+        cache = DirectoryCache()
+        with DirectoryCache.scan(cache) as active:
+            self.assertIs(active, cache)
+        self.assertIsNone(DirectoryCache._active)
+
+
+if __name__ == '__main__':
+    unittest.main()
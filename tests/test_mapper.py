@@ -0,0 +1,59 @@
+import os.path as op
+import unittest
+
+from imaya.textures.setdict import SetDict
+from imaya.textures.dircache import DirectoryCache
+from imaya.textures.attrsnapshot import AttributeSnapshot
+from imaya.textures.mapper import TextureMapper
+
+from . import TempDirTestCase
+
+
+class _Node(object):
+    _node_type = 'fake'
+    _snapshot_attrs = ()
+
+    def __init__(self, path):
+        self.node = self.path = path
+
+    def get_path(self):
+        return self.path
+
+    def get_candidates(self, key=lambda x: True, aux=True):
+        return SetDict({self.path: [self.path]})
+
+    def existing(self, texs):
+        cache = DirectoryCache.current()
+        for path, files in texs.items():
+            texs[path] = set(f for f in files if cache.is_file(f))
+        return texs
+
+
+class IterResolveTest(TempDirTestCase):
+
+    def setUp(self):
+        super(IterResolveTest, self).setUp()
+        self.write('a.png', '')
+        self.nodes = [_Node(op.join(self.dir, name))
+                      for name in ['a.png', 'b.png', 'a.png']]
+
+    def test_results(self):
+        results = TextureMapper.resolve(self.nodes)
+        self.assertEqual([len(texs.reduced()) for _, texs in results],
+                         [1, 0, 1])
+
+    def test_scans_are_closed_between_batches(self):
+        batch_size, TextureMapper.batch_size = TextureMapper.batch_size, 1
+        try:
+            results = TextureMapper.iter_resolve(self.nodes)
+            next(results)
+            self.assertIsNone(DirectoryCache._active)
+            self.assertIsNone(AttributeSnapshot.active())
+            del results
+        finally:
+            TextureMapper.batch_size = batch_size
+        self.assertIsNone(DirectoryCache._active)
+
+
+if __name__ == '__main__':
+    unittest.main()
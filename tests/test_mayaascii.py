@@ -0,0 +1,59 @@
+import unittest
+
+from imaya.offline import (MayaAsciiReader, SceneReader,
+                           read_reference_paths)
+
+from . import TempDirTestCase, scene, texture_attrs
+
+
+class MayaAsciiReaderTest(TempDirTestCase):
+
+    def read(self, text):
+        return MayaAsciiReader(self.write('shot.ma', text),
+                               texture_attrs).read()
+
+    def test_textures(self):
+        self.assertEqual(self.read(scene).textures, [
+            ('file', 'file1', '/tex/a.png'),
+            ('file', 'file2', '/a/very/long/directory/of/the/textures/b.png'),
+            ('file', 'file3', '/tex/c.png'),
+            ('file', 'file4', '/tex/d.png'),
+            ('file', 'file5', '/tex/"e".png')])
+
+    def test_references(self):
+        self.assertEqual(self.read(scene).references,
+                         {'chrRN': '/proj/chr.ma'})
+        self.assertEqual(read_reference_paths(self.write('refs.ma', scene)),
+                         {'chrRN': '/proj/chr.ma'})
+
+    def test_rename_keeps_current_node(self):
+        reader = self.read('createNode file -n "file1";\n'
+                           'rename "tex1";\n'
+                           'setAttr ".ftn" -type "string" "/a.png";\n')
+        self.assertEqual(reader.textures, [('file', 'tex1', '/a.png')])
+
+    def test_select_makes_node_current(self):
+        reader = self.read('createNode file -n "file1";\n'
+                           'createNode transform -n "t";\n'
+                           'setAttr ".ftn" -type "string" "/no.png";\n'
+                           'select -ne file1;\n'
+                           'setAttr ".ftn" -type "string" "/a.png";\n'
+                           'select -ne :time1;\n'
+                           'setAttr ".ftn" -type "string" "/no.png";\n')
+        self.assertEqual(reader.textures, [('file', 'file1', '/a.png')])
+
+    def test_tokens(self):
+        self.assertEqual(
+            MayaAsciiReader.tokens(
+                'setAttr ".ftn" -type "string" ("a" + "b\\\\c"\n + "d");'),
+            ['setAttr', '.ftn', '-type', 'string', 'ab\\cd'])
+
+
+    def test_incomplete_reader(self):
+        class Reader(SceneReader):
+            pass
+        self.assertRaises(TypeError, Reader, self.write('shot.ma', ''))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import struct
+
+from imaya.offline import MayaBinaryReader, IffReader, read_reference_paths
+
+from . import TempDirTestCase, texture_attrs
+
+
+def chunk(tag, data, size=4):
+    ''' an IFF chunk with 4 or 8 byte sizes and alignment '''
+    if size == 8:
+        header = struct.pack('>4s4xQ', tag, len(data))
+    else:
+        header = struct.pack('>4sL', tag, len(data))
+    return header + data + '\0' * (-len(data) % size)
+
+
+def group(tag, form, children, size=4):
+    form = form + '\0' * (size - 4)
+    return chunk(tag + str(size), form + ''.join(children), size)
+
+
+def scene(size=4):
+    return group('FOR', 'Maya', [
+        group('FOR', 'HEAD', [
+            chunk('FINF', 'application\0maya\0', size),
+            chunk('PLUG', 'mtoa\x001.0\0', size)], size),
+        chunk('FREF', '-rfn\0chrRN\0-typ\0mayaBinary\0/proj/chr.mb\0', size),
+        chunk('FREF', '/proj/prop.mb\0', size),
+        group('FOR', 'RTFT', [
+            chunk('CREA', '\0file1\0', size),
+            chunk('STR ', 'ftn\0\0/tex/a.png\0', size)], size),
+        group('FOR', 'PLGN', [
+            chunk('CREA', '\0dome1\0', size),
+            chunk('STR ', '.ftn\0\0/tex/sky.hdr\0', size)], size),
+        group('FOR', 'XFRM', [
+            chunk('CREA', '\0persp\0', size),
+            chunk('STR ', 'v\0\0yes\0', size)], size)], size)
+
+
+class MayaBinaryReaderTest(TempDirTestCase):
+
+    def read(self, size=4):
+        path = self.write('shot.mb', scene(size))
+        return MayaBinaryReader(path, texture_attrs).read()
+
+    def check(self, reader):
+        self.assertEqual(reader.references, {'chrRN': '/proj/chr.mb',
+                                             '/proj/prop.mb': '/proj/prop.mb'})
+        self.assertEqual(reader.file_info, [('application', 'maya')])
+        self.assertEqual(reader.plugins, [('mtoa', '1.0')])
+        # nodes of unknown types are skipped even with a matching attribute
+        self.assertEqual(reader.textures, [('file', 'file1', '/tex/a.png')])
+
+    def test_for4(self):
+        self.check(self.read(4))
+
+    def test_for8(self):
+        self.check(self.read(8))
+
+    def test_known_type_ids(self):
+        path = self.write('dome.mb', group('FOR', 'Maya', [
+            group('FOR', 'RSDL', [
+                chunk('CREA', '\0dome1\0'),
+                chunk('STR ', 'tex0\0\0/tex/sky.hdr\0')]),
+            group('FOR', 'RSNM', [
+                chunk('CREA', '\0normal1\0'),
+                chunk('STR ', 'tex0\0\0/tex/normal.png\0')])]))
+        attrs = {'RedshiftNormalMap': ('tex0',)}
+        self.assertEqual(MayaBinaryReader(path, attrs).read().textures, [])
+
+        class Reader(MayaBinaryReader):
+            node_type_ids = {'RSNM': 'RedshiftNormalMap'}
+        self.assertEqual(Reader(path, attrs).read().textures,
+                         [('RedshiftNormalMap', 'normal1', '/tex/normal.png')])
+
+    def test_chunks(self):
+        with IffReader(self.write('shot.mb', scene())) as iff:
+            tags = [(chunk.tag, chunk.form) for chunk in iff.walk(
+                descend=lambda chunk: chunk.form == 'Maya')]
+        self.assertEqual(tags[:3], [('FOR4', 'Maya'), ('FOR4', 'HEAD'),
+                                    ('FREF', None)])
+        self.assertEqual(len(tags), 7)
+
+    def test_not_iff(self):
+        self.assertRaises(ValueError, IffReader,
+                          self.write('shot.mb', 'not a scene'))
+
+    def test_read_reference_paths(self):
+        self.assertEqual(
+            read_reference_paths(self.write('shot.mb', scene()))['chrRN'],
+            '/proj/chr.mb')
@@ -0,0 +1,50 @@
+import os.path as op
+import json
+import subprocess
+import sys
+import unittest
+
+import imaya
+
+
+# imports every exporting submodule with stand-ins for maya, pymel and iutil
+# and prints the names which differ from the table of the package
+check = '''
+import importlib, json, sys
+import tests
+from imaya.profiling import install_stand_ins
+install_stand_ins()
+import imaya
+package = imaya._module
+diffs = {}
+for name in package._exporting:
+    module = importlib.import_module('imaya.' + name)
+    names = set(package._public_names(module))
+    table = set(package._exports[name])
+    if names != table:
+        diffs[name] = [sorted(names - table), sorted(table - names)]
+json.dump(diffs, sys.stdout)
+'''
+
+
+class PackageTest(unittest.TestCase):
+
+    def test_exports_table(self):
+        root = op.dirname(op.dirname(op.abspath(__file__)))
+        process = subprocess.Popen([sys.executable, '-c', check], cwd=root,
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE)
+        out, err = process.communicate()
+        self.assertEqual(process.returncode, 0, err)
+        # {module: [missing from the table, not exported]}
+        self.assertEqual(json.loads(out), {})
+
+    def test_lookup(self):
+        self.assertEqual(imaya._owners['SetDict'], 'textures')
+        # general exports the ShaderApplicationError it imports
+        self.assertEqual(imaya._owners['ShaderApplicationError'], 'general')
+        self.assertIn('referenceExists', dir(imaya))
+        self.assertRaises(AttributeError, getattr, imaya, 'no_such_name')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import pickle
+import unittest
+
+from imaya.textures.pathmap import PathMapping
+
+
+class PathMappingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.mapping = PathMapping()
+        for tile in range(1001, 1011):
+            self.mapping['/a/b/tex_v2.%d.exr' % tile] = (
+                    '/new/tex_v2.%d.exr' % tile)
+        self.mapping['/a/b/other.1001.exr'] = '/new/other.1001.exr'
+        self.mapping['/a/b//plain.exr'] = '/new/plain.exr'
+
+    def test_tokens(self):
+        mapping = self.mapping
+        self.assertEqual(mapping['/a/b/tex_v2.<UDIM>.exr'],
+                         '/new/tex_v2.<UDIM>.exr')
+        self.assertIn('/a/b/tex_v2.<udim>.exr', mapping)
+        self.assertEqual(len(mapping.key_matches('/a/b/tex_v2.####.exr')),
+                         10)
+        self.assertEqual(mapping['/a/b/other.<f>.exr'],
+                         '/new/other.<f>.exr')
+        self.assertNotIn('/a/b/tex_v2.??.exr', mapping)
+        self.assertNotIn('/a/b/nope.<udim>.exr', mapping)
+
+    def test_normalized_keys(self):
+        self.assertEqual(self.mapping['/a/b/plain.exr'], '/new/plain.exr')
+        del self.mapping['/a/b//plain.exr']
+        self.assertNotIn('/a/b/plain.exr', self.mapping)
+
+    def test_exact_keys(self):
+        self.assertFalse(dict.__contains__(
+            self.mapping, '/a/b/tex_v2.<udim>.exr'))
+        self.mapping['/a/b/tex_v2.<udim>.exr'] = '/other/tex.<udim>.exr'
+        self.assertEqual(self.mapping['/a/b/tex_v2.<udim>.exr'],
+                         '/other/tex.<udim>.exr')
+
+    def test_copies_keep_the_index(self):
+        for mapping in (pickle.loads(pickle.dumps(self.mapping, 2)),
+                        self.mapping.copy()):
+            self.assertIsInstance(mapping, PathMapping)
+            self.assertEqual(len(mapping), 12)
+            self.assertEqual(mapping['/a/b/other.<f>.exr'],
+                             '/new/other.<f>.exr')
+
+    def test_pop_unindexes(self):
+        self.mapping.update({'/x/y.1.png': '/new/y.1.png'})
+        self.assertEqual(self.mapping.get('/x/y.<f>.png'), '/new/y.<f>.png')
+        self.assertEqual(self.mapping.pop('/x/y.1.png'), '/new/y.1.png')
+        self.assertNotIn('/x/y.<f>.png', self.mapping)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+from imaya.textures.setdict import SetDict
+from imaya.textures.planner import CollectionPlanner
+
+
+class CollectionPlannerTest(unittest.TestCase):
+
+    def test_tile_ftn_before_udim_ftn(self):
+        tiles = ['/a/tex.1001.png', '/a/tex.1002.png']
+        texture_files = SetDict({'/a/tex.1001.png': tiles[:1],
+                                 '/a/tex.<udim>.png': tiles})
+        planner = CollectionPlanner('/dest')
+        mapping = planner.plan(texture_files)
+        self.assertEqual(dict.get(mapping, '/a/tex.<udim>.png'),
+                         '/dest/tex.<udim>.png')
+        self.assertEqual(mapping['/a/tex.1001.png'], '/dest/tex.1001.png')
+        self.assertEqual(sorted(planner.copies),
+                         tiles + ['/a/tex.<udim>.png'])
+
+    def test_tile_ftn_added_first(self):
+        planner = CollectionPlanner('/dest')
+        planner.add('/a/tex.1001.png', ['/a/tex.1001.png'])
+        planner.add('/a/tex.<udim>.png', ['/a/tex.1001.png'])
+        self.assertTrue(dict.__contains__(planner.mapping,
+                                          '/a/tex.<udim>.png'))
+
+    def test_groups_share_files(self):
+        texture_files = SetDict({'/a/x.<udim>.png': ['/a/x.1001.png'],
+                                 '/a/x.1001.png': ['/a/x.1001.png'],
+                                 '/a/y.png': ['/a/y.png']})
+        self.assertEqual(CollectionPlanner.groups(texture_files), [
+            (['/a/x.1001.png', '/a/x.<udim>.png'], set(['/a/x.1001.png'])),
+            (['/a/y.png'], set(['/a/y.png']))])
+
+    def test_clashing_group_is_renamed_together(self):
+        texture_files = SetDict({
+            '/a/tex.<udim>.png': ['/a/tex.1001.png', '/a/tex.1002.png'],
+            '/b/tex.<udim>.png': ['/b/tex.1001.png', '/b/Tex.1002.png']})
+        mapping = CollectionPlanner('/dest').plan(texture_files)
+        self.assertEqual(mapping['/a/tex.1002.png'], '/dest/tex.1002.png')
+        self.assertEqual(dict.get(mapping, '/b/tex.<udim>.png'),
+                         '/dest/tex_1.<udim>.png')
+        self.assertEqual(mapping['/b/tex.1001.png'], '/dest/tex_1.1001.png')
+        self.assertEqual(mapping['/b/Tex.1002.png'], '/dest/Tex_1.1002.png')
+
+    def test_duplicates_are_not_copied_again(self):
+        duplicates = {'/a/tex.png': '/a/tex.png', '/b/tex.png': '/a/tex.png'}
+        planner = CollectionPlanner('/dest', duplicates=duplicates)
+        mapping = planner.plan(SetDict({'/a/tex.png': ['/a/tex.png'],
+                                        '/b/tex.png': ['/b/tex.png']}))
+        self.assertEqual(mapping['/b/tex.png'], '/dest/tex.png')
+        self.assertEqual(list(planner.copies), ['/a/tex.png'])
+        self.assertEqual(planner.deduplicated, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import sys
+import types
+import unittest
+
+from imaya.profiling import FirstCallProfiler, profile
+
+
+class FirstCallProfilerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.module = types.ModuleType('imaya._profiled')
+        exec('def ok():\n    return 1\n\ndef fails():\n    raise ValueError(1)',
+             self.module.__dict__)
+        self.alias = types.ModuleType('imaya._alias')
+        self.alias.ok = self.module.ok
+        sys.modules.update({'imaya._profiled': self.module,
+                            'imaya._alias': self.alias})
+
+    def tearDown(self):
+        sys.modules.pop('imaya._profiled')
+        sys.modules.pop('imaya._alias')
+
+    def test_instrument_and_restore(self):
+        ok = self.module.ok
+        with FirstCallProfiler() as profiler:
+            self.assertEqual(profiler.instrument(self.module), 2)
+            self.assertIsNot(self.alias.ok, ok)
+            self.assertEqual(self.alias.ok(), 1)
+            self.module.ok()
+            self.assertRaises(ValueError, self.module.fails)
+        self.assertIs(self.module.ok, ok)
+        self.assertIs(self.alias.ok, ok)
+        self.assertEqual([(record['function'], record['error'])
+                          for record in profiler.records],
+                         [('imaya._profiled.ok', None),
+                          ('imaya._profiled.fails', 'ValueError: 1')])
+
+    def test_call_errors_are_reported(self):
+        report = profile(submodules=[], calls=['_missing.call'])
+        self.assertEqual(len(report['call_errors']), 1)
+        self.assertEqual(report['call_errors'][0]['call'], '_missing.call')
+
+
+if __name__ == '__main__':
+    unittest.main()
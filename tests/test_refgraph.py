@@ -0,0 +1,47 @@
+import os
+import os.path as op
+
+from imaya.offline import ReferenceGraph
+
+from . import TempDirTestCase
+
+
+def ma(*refs):
+    return '//Maya ASCII 2018 scene\n' + ''.join(
+            'file -r -rfn "ref%dRN" "%s";\n' % (index, ref)
+            for index, ref in enumerate(refs))
+
+
+class ReferenceGraphTest(TempDirTestCase):
+
+    def setUp(self):
+        super(ReferenceGraphTest, self).setUp()
+        self.shot = self.write('shot.ma', ma('chr.ma', 'chr.ma{1}',
+                                              'missing.ma'))
+        self.chr = self.write('chr.ma', ma('$IMAYA_TEST_DIR/rig.ma'))
+        self.rig = self.write('rig.ma', ma('chr.ma'))
+        os.environ['IMAYA_TEST_DIR'] = self.dir
+
+    def tearDown(self):
+        os.environ.pop('IMAYA_TEST_DIR', None)
+        super(ReferenceGraphTest, self).tearDown()
+
+    def test_resolve(self):
+        graph = ReferenceGraph(workers=2)
+        missing = op.join(self.dir, 'missing.ma')
+        edges = graph.resolve(self.shot)
+        self.assertEqual(edges[self.shot], [self.chr, missing])
+        self.assertEqual(edges[self.chr], [self.rig])
+        self.assertEqual(edges[missing], [])
+        self.assertEqual(graph.missing, set([missing]))
+        self.assertEqual(graph.cycles, [[self.chr, self.rig, self.chr]])
+        self.assertEqual(graph.closure(self.shot),
+                         sorted([self.chr, self.rig, missing]))
+
+    def test_cache_follows_mtime(self):
+        graph = ReferenceGraph()
+        self.assertEqual(graph.references(self.rig), [self.chr])
+        self.write('rig.ma', ma())
+        mtime = os.stat(self.rig).st_mtime + 10
+        os.utime(self.rig, (mtime, mtime))
+        self.assertEqual(graph.references(self.rig), [])
@@ -0,0 +1,68 @@
+import unittest
+
+from imaya.offline import (MayaAsciiReader, MayaAsciiRewriter,
+                           rewrite_scenes)
+
+from . import TempDirTestCase, scene, texture_attrs
+
+
+mapping = {
+    '/proj/chr.ma': '/new/chr.ma',
+    '/tex/a.png': '/new/a.png',
+    '/a/very/long/directory/of/the/textures/b.png': '/new/b.png',
+    '/tex/c.png': '/new/c.png',
+    '/tex/d.png': '/new/d.png',
+    '/tex/"e".png': '/new/"e".png'}
+
+
+class MayaAsciiRewriterTest(TempDirTestCase):
+
+    def test_rewrite(self):
+        path = self.write('shot.ma', scene)
+        dest = path.replace('shot', 'moved')
+        replacements = MayaAsciiRewriter(path, mapping,
+                                         texture_attrs).rewrite(dest)
+        self.assertEqual(sorted(set(new for _, _, new in replacements)),
+                         sorted(mapping.values()))
+        reader = MayaAsciiReader(dest, texture_attrs).read()
+        self.assertEqual([texture[1:] for texture in reader.textures], [
+            ('file1', '/new/a.png'), ('file2', '/new/b.png'),
+            ('file3', '/new/c.png'), ('file4', '/new/d.png'),
+            ('file5', '/new/"e".png')])
+        self.assertEqual(reader.references, {'chrRN': '/new/chr.ma'})
+        with open(dest, 'rb') as f:
+            text = f.read()
+        self.assertIn('rename -uid "D1A3B5C7-4E2F-11E8-9A6B-0242AC120002";',
+                      text)
+        self.assertEqual(len(text.splitlines()), len(scene.splitlines()) - 1)
+
+    def test_copy_number_is_kept(self):
+        path = self.write('shot.ma',
+                          'file -r -rfn "chrRN1" "/proj/chr.ma{1}";\n')
+        MayaAsciiRewriter(path, mapping, texture_attrs).rewrite()
+        self.assertEqual(MayaAsciiReader(path, {}).read().references,
+                         {'chrRN1': '/new/chr.ma{1}'})
+
+    def test_skipped(self):
+        path = self.write('shot.ma', 'createNode file -n "file1";\n'
+                                     'setAttr ".ftn" "/tex/a.png";\n')
+        rewriter = MayaAsciiRewriter(path, mapping, texture_attrs)
+        self.assertEqual(rewriter.rewrite(), [])
+        self.assertEqual([node for node, _ in rewriter.skipped], ['file1'])
+
+    def test_rewrite_scenes(self):
+        paths = [self.write('shot%d.ma' % index, scene) for index in range(3)]
+        results = list(rewrite_scenes(paths + [self.dir + '/missing.ma'],
+                                      mapping, processes=2))
+        self.assertEqual(len(results), 4)
+        for path, replacements, error in results:
+            if path.endswith('missing.ma'):
+                self.assertIsNone(replacements)
+                self.assertTrue(error)
+            else:
+                self.assertIsNone(error)
+                self.assertEqual(len(replacements), 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+
+from imaya.textures.setdict import SetDict
+
+
+class SetDictTest(unittest.TestCase):
+
+    def test_reduced_follows_changes(self):
+        sd = SetDict({'a': [1, 2], 'b': set([2, 3])})
+        view = sd.reduced()
+        self.assertEqual(set(view), set([1, 2, 3]))
+        sd['a'].discard(2)
+        self.assertEqual(set(view), set([1, 2, 3]))
+        sd['b'].discard(2)
+        self.assertEqual(set(view), set([1, 3]))
+        sd['c'].update([4, 5])
+        sd['c'] -= set([5])
+        del sd['a']
+        self.assertEqual(set(view), set([3, 4]))
+        sd.pop('b')
+        sd['c'] = set([6])
+        self.assertEqual(sd.reduced(snapshot=True), set([6]))
+        sd.clear()
+        self.assertEqual(len(view), 0)
+
+    def test_update_unions(self):
+        sd = SetDict({'a': [1]})
+        sd.update(SetDict({'a': [2], 'b': [3]}))
+        self.assertEqual(dict(sd), {'a': set([1, 2]), 'b': set([3])})
+        self.assertRaises(TypeError, sd.update, {'a': set()})
+        self.assertRaises(TypeError, sd.__setitem__, 'a', [1])
+
+    def test_assigned_set_is_copied(self):
+        sd, values = SetDict(), set([1])
+        sd['a'] = values
+        values.add(2)
+        self.assertEqual(sd['a'], set([1]))
+        sd['a'].add(2)
+        self.assertEqual(sd.reduced(snapshot=True), set([1, 2]))
+
+    def test_detached_values(self):
+        sd = SetDict({'a': [1]})
+        values = sd.pop('a')
+        values.add(2)
+        self.assertEqual(len(sd.reduced()), 0)
+
+    def test_copy_and_pickle(self):
+        import pickle
+        sd = SetDict({'a': [1, 2]})
+        for other in (sd.copy(), pickle.loads(pickle.dumps(sd))):
+            other['a'].add(3)
+            self.assertEqual(other.reduced(snapshot=True), set([1, 2, 3]))
+        self.assertEqual(sd.reduced(snapshot=True), set([1, 2]))
+
+    def test_view_is_read_only(self):
+        sd = SetDict({'a': [1, 2]})
+        view = sd.view()
+        self.assertRaises(KeyError, view.__getitem__, 'b')
+        self.assertNotIn('b', sd)
+        self.assertFalse(hasattr(view['a'], 'add'))
+        sd['a'].add(3)
+        self.assertEqual(set(view['a']), set([1, 2, 3]))
+        self.assertEqual(set(view.reduced()), set([1, 2, 3]))
+        copy = view.copy()
+        copy['a'].add(4)
+        self.assertIsInstance(copy, SetDict)
+        self.assertNotIn(4, sd['a'])
+
+
+if __name__ == '__main__':
+    unittest.main()
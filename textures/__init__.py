@@ -1,7 +1,15 @@
 import os.path as op
-import pymel.core as pc
+import logging
 
-import iutil as util
+try:
+    import pymel.core as pc
+except:
+    pass
+
+try:
+    import iutil as util
+except:
+    pass
 
 from .setdict import *
 from .base import *
@@ -10,24 +18,71 @@ from .filenode import *
 from .redshiftnodes import *
 from .utils import *
 from .pathmap import *
+from .copier import *
+from .planner import *
+from .dedup import *
+from .dircache import *
+from .attrsnapshot import *
+from .inventory import *
+from .scope import *
+from .manifest import *
 
 
 TextureMapper.register_texture_type(FileNode)
 TextureMapper.register_texture_type(RedshiftSprite)
 TextureMapper.register_texture_type(RedshiftNormalMap)
 _mapper = TextureMapper()
+logger = logging.getLogger(__name__)
 
 
 def textureFiles(selection=False, key=lambda x: True, getTxFiles=True,
-                 returnAsDict=False):
-    '''Collect texturefile paths from the scene'''
+                 returnAsDict=False, namespace=None, reference=None):
+    '''Collect texturefile paths from the scene, or only from the selection,
+    a namespace or a reference'''
     return _mapper.get_texture_files(selection=selection, key=key,
                                      aux=getTxFiles,
-                                     return_as_dict=returnAsDict)
+                                     return_as_dict=returnAsDict,
+                                     namespace=namespace,
+                                     reference=reference)
+
+
+def iterTextureFiles(selection=False, key=lambda x: True, getTxFiles=True,
+                     namespace=None, reference=None):
+    '''Yield (node, ftn, files) for the texturefiles of the scene, or only of
+    the selection, a namespace or a reference, as each node is resolved'''
+    return _mapper.iter_texture_files(selection=selection, key=key,
+                                      aux=getTxFiles, namespace=namespace,
+                                      reference=reference)
+
+
+def set_incremental(incremental=True):
+    '''Keep the scene texture inventory up to date from scene messages so
+    that textureFiles only resolves nodes which changed since the last call'''
+    _mapper.set_incremental(incremental)
+
+
+def texture_manifest(path, key=lambda x: True, getTxFiles=True):
+    '''Collect texturefile paths from the scene starting from the manifest
+    saved at path by an earlier call, only texture nodes or directories which
+    changed since are resolved again. The updated manifest is saved back to
+    path
+
+    @return: SetDict of texture files'''
+    manifest = None
+    if op.exists(path):
+        try:
+            manifest = TextureManifest.load(path)
+        except ValueError as e:
+            logger.warning(str(e))
+    manifest, file_texs = _mapper.update_manifest(manifest, key=key,
+                                                  aux=getTxFiles)
+    manifest.save(path)
+    return file_texs
 
 
-def get_nodes(selection=False, rn=False):
-    _mapper.get_nodes(selection=selection, reference_nodes=rn)
+def get_nodes(selection=False, rn=False, namespace=None, reference=None):
+    return _mapper.get_nodes(selection=selection, reference_nodes=rn,
+                             namespace=namespace, reference=reference)
 
 
 def texture_mapping(newdir, olddir=None, scene_textures=None):
@@ -43,16 +98,23 @@ def texture_mapping(newdir, olddir=None, scene_textures=None):
                                texture_files=scene_textures)
 
 
-def collect_textures(dest, scene_textures=None):
+def collect_textures(dest, scene_textures=None, workers=None, resume=True,
+                     dedup=False):
     '''
     Collect all scene texturefiles to a flat hierarchy in a single directory
-    while resolving nameclashes
+    while resolving nameclashes. Files are copied over a pool of workers and
+    an interrupted collection is resumed if resume is set. With dedup files
+    of identical content are collected only once
 
     @return: {ftn: tmp}
     '''
-    return _mapper.collect_textures(dest, texture_files=scene_textures)
+    return _mapper.collect_textures(dest, texture_files=scene_textures,
+                                    workers=workers, resume=resume,
+                                    dedup=dedup)
 
 
-def map_textures(mapping, selection=False, rn=True):
+def map_textures(mapping, selection=False, rn=True, namespace=None,
+                 reference=None):
     return _mapper.map_textures(mapping, selection=selection,
-                                reference_nodes=rn)
+                                reference_nodes=rn, namespace=namespace,
+                                reference=reference)
@@ -0,0 +1,136 @@
+'''Contains a snapshot of the attributes of texture nodes which is read in one
+pass and shared during a scan'''
+
+from contextlib import contextmanager
+from collections import defaultdict
+
+try:
+    import maya.cmds as cmds
+    import maya.OpenMaya as om
+except:
+    pass
+
+
+__all__ = ['AttributeSnapshot']
+
+
+class AttributeSnapshot(object):
+    ''' Values of the attributes listed in the _snapshot_attrs of each
+    TextureNode type, read for all of its nodes through the plugs of a single
+    MSelectionList instead of one getAttr command per node and attribute.
+    Attribute existence is queried once per node type from its static
+    attributes instead of once per node.
+
+    Like the DirectoryCache only one snapshot is active at a time, texture
+    nodes fall back to reading their attributes directly otherwise '''
+
+    _active = None
+
+    def __init__(self):
+        self._values = {}
+        self._exists = {}
+
+    @classmethod
+    def active(cls):
+        return cls._active
+
+    @classmethod
+    @contextmanager
+    def scan(cls):
+        ''' make a snapshot active for the duration of the context, nested
+        scans share the outer snapshot '''
+        if cls._active is not None:
+            yield cls._active
+            return
+        cls._active = cls()
+        try:
+            yield cls._active
+        finally:
+            cls._active = None
+
+    def read(self, texture_type, nodes):
+        ''' read the snapshot attributes of nodes which must all be of
+        texture_type '''
+        node_type = texture_type._node_type
+        if node_type not in self._exists:
+            self._exists[node_type] = dict(
+                    (attr, bool(cmds.attributeQuery(
+                        attr, type=node_type, exists=True)))
+                    for attr in texture_type._snapshot_attrs)
+        self.read_attrs(nodes, [attr for attr, exists
+                                in self._exists[node_type].items() if exists])
+
+    def read_attrs(self, nodes, attrs):
+        ''' read attrs, which all nodes must have, of nodes '''
+        if not attrs:
+            return
+
+        # a node is only added once to a selection list, so names are unique
+        # to keep them aligned with the indices of the list
+        names, missing = [], []
+        selection = om.MSelectionList()
+        for name in sorted(set(str(node) for node in nodes)):
+            try:
+                selection.add(name)
+            except RuntimeError:
+                missing.append(name)
+            else:
+                names.append(name)
+
+        mobj = om.MObject()
+        for index, name in enumerate(names):
+            selection.getDependNode(index, mobj)
+            fn = om.MFnDependencyNode(mobj)
+            values = self._values.setdefault(name, {})
+            for attr in attrs:
+                values[attr] = self._plug_value(fn.findPlug(attr))
+
+        # nodes which cannot be selected by name are read the slow way so
+        # that their errors are those of getAttr
+        for name in missing:
+            values = self._values.setdefault(name, {})
+            for attr in attrs:
+                values[attr] = cmds.getAttr(name + '.' + attr)
+
+    @staticmethod
+    def _plug_value(plug):
+        ''' value of a plug as getAttr would return it for the string, enum
+        and simple numeric attributes which texture nodes are resolved from
+        '''
+        attr = plug.attribute()
+        if attr.hasFn(om.MFn.kTypedAttribute):
+            if om.MFnTypedAttribute(attr).attrType() == om.MFnData.kString:
+                return plug.asString()
+        if attr.hasFn(om.MFn.kEnumAttribute):
+            return plug.asInt()
+        if attr.hasFn(om.MFn.kNumericAttribute):
+            unit = om.MFnNumericAttribute(attr).unitType()
+            if unit == om.MFnNumericData.kBoolean:
+                return plug.asBool()
+            if unit in (om.MFnNumericData.kByte, om.MFnNumericData.kChar,
+                        om.MFnNumericData.kShort, om.MFnNumericData.kInt,
+                        om.MFnNumericData.kLong):
+                return plug.asInt()
+            if unit in (om.MFnNumericData.kFloat,
+                        om.MFnNumericData.kDouble):
+                return plug.asDouble()
+        return cmds.getAttr(plug.name())
+
+    def read_all(self, t_nodes):
+        ''':type t_nodes: list of TextureNode'''
+        by_type = defaultdict(list)
+        for t_node in t_nodes:
+            by_type[type(t_node)].append(t_node.node)
+        for texture_type, nodes in by_type.items():
+            self.read(texture_type, nodes)
+
+    def has_attr(self, node_type, attr):
+        ''':return: whether nodes of node_type have attr, None if unknown'''
+        return self._exists.get(node_type, {}).get(attr)
+
+    def get(self, node, attr):
+        ''':raises KeyError: if the attribute is not in the snapshot'''
+        return self._values[str(node)][attr]
+
+    def discard(self, node):
+        self._values.pop(str(node), None)
@@ -2,13 +2,19 @@
 
 
 from abc import ABCMeta, abstractproperty
-import pymel.core as pc
+from collections import OrderedDict
+try:
+    import pymel.core as pc
+    import maya.cmds as cmds
+except:
+    pass
 
 
 from .setdict import SetDict
 from .utils import expand_path
+from .attrsnapshot import AttributeSnapshot
 
-__all__ = ['TextureNode']
+__all__ = ['TextureNode', 'set_paths']
 
 
 class TextureNode(object):
@@ -17,6 +23,11 @@ class TextureNode(object):
     __metaclass__ = ABCMeta
     __subc__ = []
 
+    # attributes which are read in bulk into an AttributeSnapshot
+    _snapshot_attrs = ()
+    # other attributes whose changes affect the resolved textures
+    _watch_attrs = ()
+
     @abstractproperty
     def _node_type(self):
         return ''
@@ -29,6 +40,22 @@ class TextureNode(object):
     def _path_write_attr(self):
         return None
 
+    @classmethod
+    def watched_attrs(cls):
+        ''' names of all attributes whose changes affect the textures '''
+        return set(cls._snapshot_attrs + cls._watch_attrs +
+                   (cls._path_read_attr, cls._path_write_attr))
+
+    def signature(self):
+        ''' values of the attributes the textures are resolved from, as a
+        list which survives a round trip through json
+        :return: list of [attr, value]'''
+        attrs = set(self._snapshot_attrs)
+        attrs.update(attr for attr in (self._path_read_attr,
+                                       self._path_write_attr) if attr)
+        return [[attr, self.get_attr(attr)] for attr in sorted(attrs)
+                if self.has_attr(attr)]
+
     @property
     def node(self):
         return self._node
@@ -50,10 +77,28 @@ class TextureNode(object):
     def get_full_path(self):
         return expand_path(self.get_path())
 
+    def get_attr(self, attr):
+        ''' value of attr from the active AttributeSnapshot or otherwise from
+        the node itself '''
+        snapshot = AttributeSnapshot.active()
+        if snapshot is not None:
+            try:
+                return snapshot.get(self.node, attr)
+            except KeyError:
+                pass
+        return pc.getAttr(self.node + '.' + attr)
+
+    def has_attr(self, attr):
+        snapshot = AttributeSnapshot.active()
+        if snapshot is not None:
+            exists = snapshot.has_attr(self._node_type, attr)
+            if exists is not None:
+                return exists
+        return pc.attributeQuery(attr, node=self.node, exists=True)
+
     def get_path(self):
         if self._path_read_attr:
-            attr = self.node.attr(self._path_read_attr)
-            return expand_path(attr.get())
+            return expand_path(self.get_attr(self._path_read_attr))
         else:
             raise NotImplementedError
 
@@ -65,20 +110,45 @@ class TextureNode(object):
         else:
             raise NotImplementedError
         attr.set(val)
+        snapshot = AttributeSnapshot.active()
+        if snapshot is not None:
+            snapshot.discard(self.node)
 
     def get_all_paths(self):
         return [self.get_path()]
 
-    def map_texture(self, mapping):
-        reverse = []
+    @classmethod
+    def set_paths(cls, changes):
+        ''' set the paths of many nodes of this type
+        :changes: list of (TextureNode, path)'''
+        attr = cls._path_write_attr or cls._path_read_attr
+        if not attr:
+            raise NotImplementedError
+        for t_node, path in changes:
+            cmds.setAttr('%s.%s' % (t_node.node, attr), path, type='string')
+        snapshot = AttributeSnapshot.active()
+        if snapshot is not None:
+            for t_node, _ in changes:
+                snapshot.discard(t_node.node)
+
+    def remap(self, mapping):
+        ''':return: (new path, old path) if the path of the node is in mapping
+        otherwise None'''
         path = self.get_path()
         if path in mapping:
-            self.set_path(mapping[path])
-            reverse.append((mapping[path], path))
+            return mapping[path], path
+
+    def map_texture(self, mapping):
+        reverse = []
+        remapped = self.remap(mapping)
+        if remapped is not None:
+            self.set_path(remapped[0])
+            reverse.append(remapped)
         return reverse
 
-    def get_textures(self, aux=True, key=lambda x: True):
-        ''':return: SetDict'''
+    def get_candidates(self, aux=True, key=lambda x: True):
+        ''' texture paths before they are checked for existence
+        :return: SetDict'''
         path = self.get_path()
         paths = self.get_all_paths()
         if aux:
@@ -86,12 +156,42 @@ class TextureNode(object):
         paths = [_path for _path in paths if key(_path)]
         return SetDict({path: paths})
 
+    def existing(self, texs):
+        ''' filter candidates returned by get_candidates to those which exist
+        :return: SetDict'''
+        return texs
+
+    def get_textures(self, aux=True, key=lambda x: True):
+        ''':return: SetDict'''
+        return self.existing(self.get_candidates(aux=aux, key=key))
+
     @classmethod
-    def get_all(cls, selection=False, reference_nodes=False):
+    def get_all(cls, selection=False, reference_nodes=False, scope=None):
         return [cls(node) for node in
                 cls.get_nodes(
-                    selection=selection, reference_nodes=reference_nodes)]
+                    selection=selection, reference_nodes=reference_nodes,
+                    scope=scope)]
 
     @classmethod
-    def get_nodes(cls, selection=False, reference_nodes=False):
-        return pc.ls(type=cls._node_type, sl=selection, rn=reference_nodes)
+    def get_nodes(cls, selection=False, reference_nodes=False, scope=None):
+        ''':scope: only consider these nodes, e.g. as returned by scope_nodes
+        '''
+        if scope is None:
+            return pc.ls(type=cls._node_type, sl=selection,
+                         rn=reference_nodes)
+        if not scope:
+            return []
+        return pc.ls(scope, type=cls._node_type, rn=reference_nodes)
+
+
+def set_paths(changes, undo_name='setTexturePaths'):
+    ''' set the paths of many texture nodes of any type in a single undo
+    step, nodes of each type are set together through their set_paths
+    :changes: list of (TextureNode, path)'''
+    from ..utils import undoChunkContext
+    by_type = OrderedDict()
+    for t_node, path in changes:
+        by_type.setdefault(type(t_node), []).append((t_node, path))
+    with undoChunkContext(undo_name):
+        for typ, typ_changes in by_type.items():
+            typ.set_paths(typ_changes)
@@ -0,0 +1,122 @@
+'''Contains a threaded and resumable file copy engine'''
+
+import os
+import os.path as op
+import shutil
+import json
+import logging
+import threading
+from multiprocessing.pool import ThreadPool
+
+
+logger = logging.getLogger(__name__)
+__all__ = ['CopyEngine']
+
+
+class CopyEngine(object):
+    ''' Copies files over a pool of threads.
+
+    Destinations whose size and mtime already match their source are skipped
+    and every finished copy is recorded in a journal inside the destination
+    directory, so that an interrupted run resumes where it stopped. The
+    journal is removed once a run completes '''
+
+    journal_name = '.imaya_copy.journal'
+    workers = 8
+
+    def __init__(self, dest, workers=None, journal=True):
+        self.dest = dest
+        if workers is not None:
+            self.workers = max(1, int(workers))
+        self.journal = journal
+        self._done = {}
+        self._lock = threading.Lock()
+        self._journal_file = None
+
+    @property
+    def journal_path(self):
+        return op.join(self.dest, self.journal_name)
+
+    @staticmethod
+    def signature(path):
+        ''':return: (size, mtime) of the path'''
+        st = os.stat(path)
+        return st.st_size, int(st.st_mtime)
+
+    def load_journal(self):
+        self._done = {}
+        if not self.journal or not op.isfile(self.journal_path):
+            return self._done
+        with open(self.journal_path) as journal:
+            for line in journal:
+                try:
+                    src, dst, size, mtime = json.loads(line)
+                except ValueError:
+                    # a line cut short by the interruption
+                    continue
+                self._done[(src, dst)] = (size, mtime)
+        logger.info('Resuming copy with %d journalled files' %
+                    len(self._done))
+        return self._done
+
+    def _record(self, src, dst, sig):
+        if self._journal_file is None:
+            return
+        with self._lock:
+            self._journal_file.write(json.dumps([src, dst] + list(sig)))
+            self._journal_file.write('\n')
+            self._journal_file.flush()
+
+    def up_to_date(self, src, dst, sig=None):
+        if sig is None:
+            sig = self.signature(src)
+        if self._done.get((src, dst)) == sig and op.isfile(dst):
+            return True
+        try:
+            return self.signature(dst) == sig
+        except OSError:
+            return False
+
+    def copy(self, src, dst):
+        ''' copy a single file
+        :return: None if the source is not a file, False if the destination
+        was already up to date and True if it was copied '''
+        if not op.isfile(src):
+            return None
+        sig = self.signature(src)
+        if self.up_to_date(src, dst, sig):
+            return False
+        tmp = dst + '.part'
+        shutil.copy2(src, tmp)
+        if op.exists(dst):
+            os.remove(dst)
+        os.rename(tmp, dst)
+        self._record(src, dst, sig)
+        return True
+
+    def _copy_job(self, job):
+        src, dst = job
+        return src, dst, self.copy(src, dst)
+
+    def run(self, jobs):
+        ''' copy all (src, dst) jobs
+        :return: generator of (src, dst, status) in order of completion where
+        status is as returned by copy '''
+        jobs = list(jobs)
+        self.load_journal()
+        if self.journal:
+            self._journal_file = open(self.journal_path, 'a')
+
+        pool = ThreadPool(min(self.workers, len(jobs)) or 1)
+        try:
+            for result in pool.imap_unordered(self._copy_job, jobs):
+                yield result
+        finally:
+            pool.terminate()
+            pool.join()
+            if self._journal_file is not None:
+                self._journal_file.close()
+                self._journal_file = None
+
+        if self.journal and op.exists(self.journal_path):
+            os.remove(self.journal_path)
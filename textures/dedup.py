@@ -0,0 +1,88 @@
+'''Contains functions for finding files with identical content'''
+
+import os
+import os.path as op
+import hashlib
+from collections import defaultdict
+from multiprocessing.pool import ThreadPool
+
+
+__all__ = ['find_duplicates']
+
+
+PARTIAL_SIZE = 64 * 1024
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_size(path):
+    try:
+        if op.isfile(path):
+            return os.stat(path).st_size
+    except OSError:
+        pass
+    return None
+
+
+def partial_hash(path, size=PARTIAL_SIZE):
+    ''' hash of the first and last size bytes of a file '''
+    md5 = hashlib.md5()
+    with open(path, 'rb') as _file:
+        md5.update(_file.read(size))
+        _file.seek(0, os.SEEK_END)
+        if _file.tell() > size:
+            _file.seek(-min(size, _file.tell() - size), os.SEEK_END)
+            md5.update(_file.read(size))
+    return md5.hexdigest()
+
+
+def full_hash(path, chunk_size=CHUNK_SIZE):
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as _file:
+        for chunk in iter(lambda: _file.read(chunk_size), b''):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def _split(groups, func, pool):
+    ''' split groups of candidate duplicates further by the result of func,
+    groups with a single member are dropped '''
+    jobs = [(index, path) for index, group in enumerate(groups)
+            for path in group]
+    keys = pool.map(func, [path for _, path in jobs]) if jobs else []
+    new_groups = defaultdict(list)
+    for (index, path), key in zip(jobs, keys):
+        new_groups[(index, key)].append(path)
+    return [group for group in new_groups.values() if len(group) > 1]
+
+
+def find_duplicates(paths, workers=8):
+    ''' find files with identical content by comparing size first, then a
+    partial hash and finally a full hash, so only likely duplicates are read
+    completely
+
+    :return: dict mapping every existing file to a content key shared by all
+    of its duplicates, the key is the first of the duplicates in sorted order
+    '''
+    paths = sorted(set(paths))
+    pool = ThreadPool(max(1, workers))
+    try:
+        by_size = defaultdict(list)
+        for path, size in zip(paths, pool.map(file_size, paths)):
+            if size is not None:
+                by_size[size].append(path)
+
+        content = dict((path, path) for group in by_size.values()
+                       for path in group)
+
+        groups = [group for group in by_size.values() if len(group) > 1]
+        groups = _split(groups, partial_hash, pool)
+        groups = _split(groups, full_hash, pool)
+    finally:
+        pool.terminate()
+        pool.join()
+
+    for group in groups:
+        group.sort()
+        for path in group:
+            content[path] = group[0]
+    return content
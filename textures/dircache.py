@@ -0,0 +1,246 @@
+'''Contains a directory listing cache which is shared by all texture nodes
+during a scan so that every directory is listed only once'''
+
+import os
+import os.path as op
+import re
+import bisect
+import threading
+from contextlib import contextmanager
+from collections import defaultdict
+from multiprocessing.pool import ThreadPool
+
+try:
+    from os import scandir
+except ImportError:
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
+
+__all__ = ['DirectoryCache', 'get_uv_tiles', 'get_sequence_files',
+           'get_file_by_extension', 'is_file']
+
+
+class _Listing(object):
+    ''' Files in a single directory indexed by normalized name, stem and
+    sorted for prefix searches '''
+
+    def __init__(self, dirname):
+        self.dirname = dirname
+        self.files = {}
+        self.stems = {}
+        for name in self._list(dirname):
+            key = op.normcase(name)
+            self.files[key] = name
+            stem, ext = op.splitext(key)
+            self.stems.setdefault(stem, {})[ext[1:]] = name
+        self.sorted = sorted(self.files)
+
+    @staticmethod
+    def _list(dirname):
+        try:
+            if scandir is not None:
+                return [entry.name for entry in scandir(dirname)
+                        if entry.is_file()]
+            # without scandir every entry is stat'ed so that directories
+            # are not taken for files
+            return [name for name in os.listdir(dirname)
+                    if op.isfile(op.join(dirname, name))]
+        except OSError:
+            return []
+
+    def with_prefix(self, prefix):
+        ''':return: actual names of files whose normalized name starts with
+        prefix'''
+        prefix = op.normcase(prefix)
+        start = bisect.bisect_left(self.sorted, prefix)
+        names = []
+        for key in self.sorted[start:]:
+            if not key.startswith(prefix):
+                break
+            names.append(self.files[key])
+        return names
+
+    def matching(self, prefix, pattern):
+        return [name for name in self.with_prefix(prefix)
+                if pattern.match(op.normcase(name))]
+
+
+class DirectoryCache(object):
+    ''' Snapshot of directory listings which are taken on first use.
+
+    Only one cache is active at a time, it is set up by the scan context
+    manager and consulted by the module functions. When no scan is active
+    a fresh cache is used for each call.
+
+    Listings and file checks can be made in bulk over a pool of threads with
+    prefetch and exists_many so that their latencies overlap '''
+
+    _active = None
+    workers = 8
+    # directories with fewer unlisted candidates than this are not listed,
+    # their candidates are stat'ed instead
+    stat_threshold = 4
+
+    uv_tokens = [
+            (re.compile(r'<udim>', re.I), r'\d{4}'),
+            (re.compile(r'<uvtile>', re.I), r'u\d+_v\d+'),
+            (re.compile(r'<u>|<v>', re.I), r'\d+')]
+    udim_re = re.compile(r'\d{4}')
+    uvtile_re = re.compile(r'u\d+_v\d+', re.I)
+    frameno_re = re.compile(r'\d+')
+    # the tile in the paths of tiles without tokens, by tiling mode
+    mode_tiles = {'mari': udim_re, 'zbrush': uvtile_re, 'mudbox': uvtile_re}
+
+    def __init__(self):
+        self._listings = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def current(cls):
+        return cls._active if cls._active is not None else cls()
+
+    @classmethod
+    @contextmanager
+    def scan(cls, cache=None):
+        ''' make a cache, a new one unless given, active for the duration of
+        the context, nested scans share the outer cache '''
+        if cls._active is not None:
+            yield cls._active
+            return
+        cls._active = cache if cache is not None else cls()
+        try:
+            yield cls._active
+        finally:
+            cls._active = None
+
+    def listing(self, dirname):
+        key = op.normcase(op.normpath(dirname))
+        listing = self._listings.get(key)
+        if listing is None:
+            listing = _Listing(dirname)
+            with self._lock:
+                listing = self._listings.setdefault(key, listing)
+        return listing
+
+    def _listed(self, dirname):
+        return op.normcase(op.normpath(dirname)) in self._listings
+
+    def _stat(self, path):
+        self._stats[op.normcase(op.normpath(path))] = op.isfile(path)
+
+    def _map(self, func, items, workers=None):
+        if len(items) < 2:
+            return map(func, items)
+        pool = ThreadPool(min(workers or self.workers, len(items)))
+        try:
+            return pool.map(func, items)
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def prefetch(self, dirnames, workers=None):
+        ''' list all the directories which are not listed yet concurrently '''
+        dirnames = set(op.normpath(dirname) for dirname in dirnames)
+        self._map(self.listing, [dirname for dirname in dirnames
+                                 if not self._listed(dirname)], workers)
+
+    def exists_many(self, paths, workers=None):
+        ''' check in one batch whether paths are files. Listed directories
+        answer from their listings, the others are listed or their paths are
+        stat'ed concurrently and the results are kept for later checks
+        :return: dict of path to bool '''
+        paths = list(paths)
+        by_dir = defaultdict(list)
+        for path in paths:
+            if op.normcase(op.normpath(path)) not in self._stats:
+                by_dir[op.dirname(op.normpath(path))].append(path)
+
+        jobs = []
+        for dirname, dir_paths in by_dir.items():
+            if self._listed(dirname):
+                continue
+            if len(dir_paths) >= self.stat_threshold:
+                jobs.append((self.listing, dirname))
+            else:
+                jobs.extend((self._stat, path) for path in dir_paths)
+        self._map(lambda job: job[0](job[1]), jobs, workers)
+
+        return dict((path, self.is_file(path)) for path in paths)
+
+    def is_file(self, path):
+        isfile = self._stats.get(op.normcase(op.normpath(path)))
+        if isfile is not None:
+            return isfile
+        dirname, basename = op.split(op.normpath(path))
+        return op.normcase(basename) in self.listing(dirname).files
+
+    def get_file_by_extension(self, path, ext='tx'):
+        ''':return: file with the same stem as path and the given extension
+        if one exists'''
+        dirname, basename = op.split(op.normpath(path))
+        stem = op.normcase(op.splitext(basename)[0])
+        name = self.listing(dirname).stems.get(stem, {}).get(
+                op.normcase(ext))
+        if name:
+            return op.join(dirname, name)
+
+    def _find(self, path, tokens):
+        ''' find files in the directory of path matching its basename in
+        which tokens, a list of (start, end, regex), are replaced by regex '''
+        dirname, basename = op.split(op.normpath(path))
+        basename = op.normcase(basename)
+        tokens.sort()
+        pattern, last = '', 0
+        for start, end, regex in tokens:
+            pattern += re.escape(basename[last:start]) + regex
+            last = end
+        pattern += re.escape(basename[last:]) + '$'
+        prefix = basename[:tokens[0][0]]
+        return [op.join(dirname, name) for name in
+                self.listing(dirname).matching(prefix, re.compile(pattern))]
+
+    def get_uv_tiles(self, path, mode=None):
+        ''':return: files matching the uv tile tokens in path. If there are
+        no tokens the last tile in the path of a tile is used instead, a four
+        digit number for mari and u<n>_v<n> for zbrush and mudbox'''
+        basename = op.basename(path)
+        tokens = [(match.start(), match.end(), regex)
+                  for token_re, regex in self.uv_tokens
+                  for match in token_re.finditer(basename)]
+        if not tokens and mode in self.mode_tiles:
+            tile_re = self.mode_tiles[mode]
+            tiles = list(tile_re.finditer(basename))
+            if tiles:
+                tokens = [(tiles[-1].start(), tiles[-1].end(),
+                           tile_re.pattern)]
+        if not tokens:
+            return []
+        return self._find(path, tokens)
+
+    def get_sequence_files(self, path):
+        ''':return: files which differ from path only in its last number'''
+        numbers = list(self.frameno_re.finditer(op.basename(path)))
+        if not numbers:
+            return []
+        return self._find(path, [(numbers[-1].start(), numbers[-1].end(),
+                                  self.frameno_re.pattern)])
+
+
+def get_uv_tiles(path, mode=None):
+    return DirectoryCache.current().get_uv_tiles(path, mode)
+
+
+def get_sequence_files(path):
+    return DirectoryCache.current().get_sequence_files(path)
+
+
+def get_file_by_extension(path, ext='tx'):
+    return DirectoryCache.current().get_file_by_extension(path, ext)
+
+
+def is_file(path):
+    return DirectoryCache.current().is_file(path)
@@ -2,13 +2,24 @@
 
 import os.path as op
 
-import pymel.core as pc
+try:
+    import pymel.core as pc
+    import maya.cmds as cmds
+except:
+    pass
 
-import iutil
+try:
+    import iutil
+except:
+    pass
 
 from .setdict import SetDict
-from .base import TextureNode
-from .utils import read_full_path_from_attribute
+from .base import TextureNode, set_paths
+from .pathmap import PathMapping
+from .attrsnapshot import AttributeSnapshot
+from .utils import read_full_path_from_attribute, expand_path
+from .dircache import (DirectoryCache, get_uv_tiles, get_sequence_files,
+                       get_file_by_extension)
 
 
 __all__ = ['FileNode', 'renameFileNodePath', 'getFullpathFromAttr',
@@ -19,6 +30,8 @@ class FileNode(TextureNode):
     _node_type = 'file'
     _path_read_attr = 'cfnp'
     _path_write_attr = 'ftn'
+    _snapshot_attrs = ('ftn', 'cfnp', 'uvt', 'useFrameExtension')
+    _watch_attrs = ('euvt',)
 
     uv_tiling_modes = ['None', 'zbrush', 'mudbox', 'mari', 'explicit']
 
@@ -55,25 +68,24 @@ class FileNode(TextureNode):
     def _get_textures(self):
         texs = SetDict()
 
-        filepath = read_full_path_from_attribute(self.node + '.ftn')
+        filepath = expand_path(self.get_attr('ftn'))
         uv_tiling_mode = self.uv_tiling_modes[0]
 
         # New in Maya 2015
-        if pc.attributeQuery('uvTilingMode', node=self.node, exists=True):
-            uv_tiling_mode = self.uv_tiling_modes[pc.getAttr(self.node +
-                                                  '.uvt')]
+        if self.has_attr('uvt'):
+            uv_tiling_mode = self.uv_tiling_modes[self.get_attr('uvt')]
 
         # still attempt to resolve using tokens in string
         if uv_tiling_mode == 'None':
             uv_tiling_mode = str(iutil.detectUdim(filepath))
         elif not uv_tiling_mode == 'explicit':
-            filepath = read_full_path_from_attribute(self.node + '.cfnp')
+            filepath = expand_path(self.get_attr('cfnp'))
 
         # definitely no udim
         if uv_tiling_mode == 'None':
             texs[filepath].add(filepath)
-            if pc.getAttr(self.node + '.useFrameExtension'):
-                seqTex = iutil.getSequenceFiles(filepath)
+            if self.get_attr('useFrameExtension'):
+                seqTex = get_sequence_files(filepath)
                 if seqTex:
                     texs[filepath].update(seqTex)
 
@@ -88,10 +100,21 @@ class FileNode(TextureNode):
                 texs[filepath].add(filepath)
 
         else:  # 'mari', 'zbrush', 'mudbox'
-            texs[filepath].update(iutil.getUVTiles(filepath, uv_tiling_mode))
+            texs[filepath].update(get_uv_tiles(filepath, uv_tiling_mode))
 
         return texs
 
+    def signature(self):
+        ''' explicit uv tile names are part of the signature when used '''
+        signature = super(FileNode, self).signature()
+        if (self.has_attr('uvt') and self.uv_tiling_modes[
+                self.get_attr('uvt')] == 'explicit'):
+            indices = pc.getAttr(self.node + '.euvt', mi=True) or []
+            signature.append(['euvt', [
+                pc.getAttr(self.node + '.euvt[%d].eutn' % index)
+                for index in indices]])
+        return signature
+
     def get_all_paths(self, texs=None):
         if texs is None:
             texs = self._get_textures()
@@ -106,18 +129,19 @@ class FileNode(TextureNode):
             aux_files = []
             for file_ in files:
                 if tx_files:
-                    tx = iutil.getFileByExtension(file_, ext='tx')
+                    tx = get_file_by_extension(file_, ext='tx')
                     if tx:
                         aux_files.append(tx)
                 if tex_files:
-                    tex = iutil.getFileByExtension(file_, ext='tex')
+                    tex = get_file_by_extension(file_, ext='tex')
                     if tex:
                         aux_files.append(tex)
             auxs[k].update(aux_files)
 
         return auxs
 
-    def get_textures(self, key=lambda _op: True, aux=True, tx=True, tex=True):
+    def get_candidates(self, key=lambda _op: True, aux=True, tx=True,
+                       tex=True):
         texs = self._get_textures()
 
         if aux:
@@ -125,33 +149,61 @@ class FileNode(TextureNode):
             texs.update(auxs)
 
         for path, _files in texs.items():
-            files = []
-            for filepath in _files:
-                if (key(filepath) and op.exists(filepath) and
-                        op.isfile(filepath)):
-                    files.append(filepath)
-            texs[path] = set(files)
+            texs[path] = set(filepath for filepath in _files if key(filepath))
 
         return texs
-    
+
+    def existing(self, texs):
+        cache = DirectoryCache.current()
+        cache.exists_many(texs.reduced())
+        for path, _files in texs.items():
+            texs[path] = set(filepath for filepath in _files
+                             if cache.is_file(filepath))
+        return texs
+
+    def get_textures(self, key=lambda _op: True, aux=True, tx=True, tex=True):
+        return self.existing(
+                self.get_candidates(key=key, aux=aux, tx=tx, tex=tex))
+
     def set_path(self, val):
-        cs = self.node.colorSpace.get()
-        super(FileNode, self).set_path(val)
-        self.node.colorSpace.set(cs)
-        
+        self.set_paths([(self, val)])
+
+    @classmethod
+    def set_paths(cls, changes):
+        ''' set the paths of many file nodes while keeping their color
+        spaces. The color spaces are read in bulk before and after the paths
+        are set, only those which the color space file rules changed are
+        set back '''
+        nodes = [str(t_node.node) for t_node, _ in changes]
+        before = AttributeSnapshot()
+        before.read_attrs(nodes, ['colorSpace'])
+
+        super(FileNode, cls).set_paths(changes)
+
+        after = AttributeSnapshot()
+        after.read_attrs(nodes, ['colorSpace'])
+        for node in nodes:
+            color_space = before.get(node, 'colorSpace')
+            if after.get(node, 'colorSpace') != color_space:
+                cmds.setAttr(node + '.colorSpace', color_space,
+                             type='string')
 
 
 def renameFileNodePath(mapping):
+    ''' set the ftn of every file node found in mapping. The mapping is
+    normalized once into a PathMapping so each node costs one normalization
+    and one lookup, token ftns resolve the way PathMapping resolves them '''
     if not mapping:
         return False  # an exception should (idly) be raise
     else:
+        index = PathMapping(
+                (iutil.normpath(path), new) for path, new in mapping.items())
+        changes = []
         for fileNode in pc.ls(type="file"):
-            for path in mapping:
-                if iutil.normpath(
-                        pc.getAttr(fileNode + ".ftn")) == iutil.normpath(path):
-                    cs = fileNode.colorSpace.get()
-                    pc.setAttr(fileNode + ".ftn", mapping[path])
-                    fileNode.colorSpace.set(cs)
+            ftn = iutil.normpath(cmds.getAttr(str(fileNode) + ".ftn") or '')
+            if ftn in index:
+                changes.append((FileNode(fileNode), index[ftn]))
+        set_paths(changes, undo_name='renameFileNodePath')
 
 
 def createFileNodes(paths=[]):
@@ -0,0 +1,205 @@
+'''Contains an incremental texture inventory which is kept up to date with
+scene messages'''
+
+import logging
+
+try:
+    import maya.OpenMaya as om
+    import pymel.core as pc
+except:
+    pass
+
+from .setdict import SetDict
+
+
+logger = logging.getLogger(__name__)
+__all__ = ['TextureInventory']
+
+
+class TextureInventory(object):
+    ''' Resolved textures of all texture nodes in the scene kept per node.
+
+    Node added, node removed and attribute changed messages of the
+    registered texture node types mark only the affected nodes dirty and
+    those are resolved again on the next query. An unchanged scene returns
+    the previous result. Opening or creating a scene, importing and any
+    change to references rebuilds the inventory from scratch.
+
+    Files appearing or vanishing on disk are not noticed, invalidate forces
+    all nodes to be resolved again. Node types whose messages cannot be
+    subscribed to, e.g. of plugins which are not loaded, are scanned on
+    every query '''
+
+    _reset_messages = ('kAfterOpen', 'kAfterNew', 'kAfterImport',
+                       'kAfterLoadReference', 'kAfterUnloadReference',
+                       'kAfterCreateReference', 'kAfterRemoveReference')
+    _suspend_messages = ('kBeforeOpen', 'kBeforeNew', 'kBeforeImport',
+                         'kBeforeLoadReference', 'kBeforeUnloadReference',
+                         'kBeforeCreateReference', 'kBeforeRemoveReference')
+    _changes = ('kAttributeSet', 'kConnectionMade', 'kConnectionBroken',
+                'kAttributeArrayAdded', 'kAttributeArrayRemoved')
+
+    def __init__(self, mapper):
+        ''':type mapper: TextureMapper'''
+        self.mapper = mapper
+        self._types = {}
+        self._untracked = []
+        self._handles = {}
+        self._t_nodes = {}
+        self._results = {}
+        # keys of tracked nodes which are not resolved, with and without aux
+        self._stale = {True: set(), False: set()}
+        self._merged = None
+        self._suspended = False
+        self._callbacks = []
+        self._node_callbacks = {}
+
+    @property
+    def active(self):
+        return bool(self._callbacks)
+
+    def start(self):
+        if self.active:
+            return
+        self._types = {}
+        self._untracked = []
+        for typ in self.mapper.get_texture_types():
+            try:
+                self._callbacks.append(om.MDGMessage.addNodeAddedCallback(
+                    self._node_added, typ._node_type))
+                self._callbacks.append(om.MDGMessage.addNodeRemovedCallback(
+                    self._node_removed, typ._node_type))
+            except RuntimeError:
+                logger.warning('%s nodes are not tracked incrementally' %
+                               typ._node_type)
+                self._untracked.append(typ)
+            else:
+                self._types[typ._node_type] = typ
+        for message in self._suspend_messages:
+            self._callbacks.append(om.MSceneMessage.addCallback(
+                getattr(om.MSceneMessage, message), self._suspend))
+        for message in self._reset_messages:
+            self._callbacks.append(om.MSceneMessage.addCallback(
+                getattr(om.MSceneMessage, message), self._reset))
+        self._reset()
+
+    def stop(self):
+        self._clear()
+        for callback in self._callbacks:
+            om.MMessage.removeCallback(callback)
+        self._callbacks = []
+
+    def invalidate(self):
+        ''' resolve all nodes again on the next query '''
+        self._results.clear()
+        for stale in self._stale.values():
+            stale.clear()
+            stale.update(self._handles)
+        self._merged = None
+
+    def _clear(self):
+        for callback in self._node_callbacks.values():
+            om.MMessage.removeCallback(callback)
+        self._node_callbacks.clear()
+        self._handles.clear()
+        self._t_nodes.clear()
+        self.invalidate()
+
+    def _suspend(self, *args):
+        self._suspended = True
+
+    def _reset(self, *args):
+        self._suspended = False
+        self._clear()
+        for typ in self._types.values():
+            for node in typ.get_nodes():
+                self._track(node.__apimobject__())
+
+    def _track(self, mobj):
+        typ = self._types.get(om.MFnDependencyNode(mobj).typeName())
+        if typ is None:
+            return
+        handle = om.MObjectHandle(mobj)
+        key = handle.hashCode()
+        self._handles[key] = (typ, handle)
+        self._node_callbacks[key] = (
+                om.MNodeMessage.addAttributeChangedCallback(
+                    mobj, self._attribute_changed, key))
+        self._dirty(key)
+
+    def _dirty(self, key):
+        for aux, stale in self._stale.items():
+            self._results.pop((key, aux), None)
+            stale.add(key)
+        self._merged = None
+
+    def _node_added(self, mobj, *args):
+        if not self._suspended:
+            self._track(mobj)
+
+    def _node_removed(self, mobj, *args):
+        key = om.MObjectHandle(mobj).hashCode()
+        callback = self._node_callbacks.pop(key, None)
+        if callback is not None:
+            om.MMessage.removeCallback(callback)
+        self._handles.pop(key, None)
+        self._t_nodes.pop(key, None)
+        for aux, stale in self._stale.items():
+            self._results.pop((key, aux), None)
+            stale.discard(key)
+        self._merged = None
+
+    def _attribute_changed(self, msg, plug, other_plug, key):
+        if not any(msg & getattr(om.MNodeMessage, change)
+                   for change in self._changes):
+            return
+        typ, _ = self._handles.get(key, (None, None))
+        if typ is None:
+            return
+        watched = typ.watched_attrs()
+        for long_names in (False, True):
+            name = plug.partialName(
+                    False, False, False, False, True, long_names)
+            if name.split('.')[0].split('[')[0] in watched:
+                self._dirty(key)
+                return
+
+    def _texture_node(self, key):
+        t_node = self._t_nodes.get(key)
+        if t_node is None:
+            typ, handle = self._handles[key]
+            t_node = self._t_nodes[key] = typ(pc.PyNode(handle.object()))
+        return t_node
+
+    def get_texture_files(self, key=lambda x: True, aux=True):
+        ''':return: read only SetDictView of all texture files in the scene,
+        the same result is returned for as long as the scene does not
+        change, use its copy to get a SetDict which may be changed'''
+        aux = bool(aux)
+        missing = list(self._stale[aux])
+        if (not missing and not self._untracked and
+                self._merged is not None and self._merged[0] == (aux, key)):
+            return self._merged[1]
+
+        if missing:
+            t_nodes = [self._texture_node(node_key) for node_key in missing]
+            for node_key, (_, t_texs) in zip(
+                    missing, self.mapper.resolve(t_nodes, aux=aux)):
+                self._results[(node_key, aux)] = t_texs
+            self._stale[aux].clear()
+
+        results = [t_texs for (_, _aux), t_texs in self._results.items()
+                   if _aux == aux]
+        if self._untracked:
+            t_nodes = [t_node for typ in self._untracked
+                       for t_node in typ.get_all()]
+            results.extend(t_texs for _, t_texs in
+                           self.mapper.resolve(t_nodes, aux=aux))
+
+        file_texs = SetDict()
+        for t_texs in results:
+            for path, files in t_texs.items():
+                file_texs[path].update(
+                        filepath for filepath in files if key(filepath))
+        self._merged = ((aux, key), file_texs.view())
+        return self._merged[1]
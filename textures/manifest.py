@@ -0,0 +1,146 @@
+'''Contains a texture manifest which keeps the result of a scan on disk so
+that later scans only resolve what changed'''
+
+import os
+import os.path as op
+import json
+import logging
+
+from .setdict import SetDict
+from .attrsnapshot import AttributeSnapshot
+
+
+logger = logging.getLogger(__name__)
+__all__ = ['TextureManifest']
+
+
+class TextureManifest(object):
+    ''' Resolved textures of every texture node along with what they were
+    resolved from.
+
+    For each node the manifest keeps its type, a signature of its attributes,
+    its textures with the size and mtime of every file and the mtimes of the
+    directories they were found in. A node is resolved again only if it is
+    new, its signature changed or one of its directories was modified, nodes
+    which are gone are dropped.
+
+    Files modified in place do not change their directory, use changed_files
+    to find those '''
+
+    version = 1
+
+    def __init__(self, aux=True):
+        self.aux = aux
+        self.nodes = {}
+        self._dir_mtimes = {}
+
+    @classmethod
+    def load(cls, path):
+        ''':raises ValueError: if the file is not a manifest of this version'''
+        with open(path) as manifest_file:
+            data = json.load(manifest_file)
+        if data.get('version') != cls.version:
+            raise ValueError('%s is not a texture manifest of version %d' %
+                             (path, cls.version))
+        manifest = cls(aux=data['aux'])
+        manifest.nodes = data['nodes']
+        return manifest
+
+    def save(self, path):
+        ''' write the manifest to a temporary file which then replaces path so
+        that an interrupted save leaves the previous manifest intact '''
+        part = path + '.part'
+        with open(part, 'w') as manifest_file:
+            json.dump({'version': self.version, 'aux': self.aux,
+                       'nodes': self.nodes}, manifest_file)
+        if os.name == 'nt' and op.exists(path):
+            os.remove(path)
+        os.rename(part, path)
+
+    @staticmethod
+    def _stat(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return [st.st_size, st.st_mtime]
+
+    def _dir_mtime(self, dirname):
+        if dirname not in self._dir_mtimes:
+            try:
+                self._dir_mtimes[dirname] = os.stat(dirname).st_mtime
+            except OSError:
+                self._dir_mtimes[dirname] = None
+        return self._dir_mtimes[dirname]
+
+    def record(self, t_node, t_texs):
+        ''' keep the resolved textures of t_node
+        :type t_node: TextureNode
+        :type t_texs: SetDict'''
+        files = dict((path, self._stat(path)) for path in t_texs.reduced())
+        dirs = set(op.dirname(path) for path in t_texs)
+        dirs.update(op.dirname(path) for path in files)
+        self.nodes[str(t_node.node)] = {
+                'type': t_node._node_type,
+                'signature': t_node.signature(),
+                'textures': dict((path, sorted(t_files))
+                                 for path, t_files in t_texs.items()),
+                'files': files,
+                'dirs': dict((dirname, self._dir_mtime(dirname))
+                             for dirname in dirs)}
+
+    def is_current(self, t_node):
+        ''':return: whether the recorded textures of t_node are still valid'''
+        entry = self.nodes.get(str(t_node.node))
+        if entry is None or entry['type'] != t_node._node_type:
+            return False
+        if entry['signature'] != t_node.signature():
+            return False
+        return all(self._dir_mtime(dirname) == mtime
+                   for dirname, mtime in entry['dirs'].items())
+
+    def update(self, mapper, t_nodes):
+        ''' resolve t_nodes whose entries are not current with mapper and drop
+        the entries of all other nodes
+        :type mapper: TextureMapper
+        :return: number of nodes resolved'''
+        self._dir_mtimes.clear()
+        with AttributeSnapshot.scan() as snapshot:
+            snapshot.read_all(t_nodes)
+            stale = [t_node for t_node in t_nodes
+                     if not self.is_current(t_node)]
+            names = set(str(t_node.node) for t_node in t_nodes)
+            for name in set(self.nodes).difference(names):
+                del self.nodes[name]
+            for t_node, t_texs in mapper.resolve(stale, aux=self.aux):
+                self.record(t_node, t_texs)
+        logger.debug('%d of %d texture nodes resolved' % (
+            len(stale), len(t_nodes)))
+        return len(stale)
+
+    def texture_files(self, key=lambda x: True):
+        ''':return: SetDict of all recorded textures'''
+        file_texs = SetDict()
+        for entry in self.nodes.values():
+            for path, files in entry['textures'].items():
+                file_texs[path].update(
+                        filepath for filepath in files if key(filepath))
+        return file_texs
+
+    def stat(self, path):
+        ''':return: recorded [size, mtime] of path, None if not recorded'''
+        for entry in self.nodes.values():
+            if path in entry['files']:
+                return entry['files'][path]
+
+    def owners(self, path):
+        ''':return: names of the nodes which use path'''
+        return sorted(name for name, entry in self.nodes.items()
+                      if path in entry['files'])
+
+    def changed_files(self):
+        ''':return: recorded files whose size or mtime differ on disk now'''
+        return sorted(set(
+            path for entry in self.nodes.values()
+            for path, stat in entry['files'].items()
+            if self._stat(path) != stat))
@@ -1,14 +1,24 @@
 '''Contains Texture Handler class'''
 
 import os.path as op
-import shutil
 import logging
 
-import iutil
+try:
+    import iutil
+except:
+    pass
 
 from .setdict import SetDict
-from .base import TextureNode
+from .base import TextureNode, set_paths
 from .pathmap import PathMapping
+from .copier import CopyEngine
+from .planner import CollectionPlanner
+from .dedup import find_duplicates
+from .dircache import DirectoryCache
+from .attrsnapshot import AttributeSnapshot
+from .inventory import TextureInventory
+from .scope import scope_nodes
+from .manifest import TextureManifest
 
 
 logger = logging.getLogger(__name__)
@@ -18,10 +28,29 @@ __all__ = ['TextureMapper']
 class TextureMapper(object):
     __texture_types__ = []
     _instance = None
+    # number of nodes resolved together by iter_resolve
+    batch_size = 64
 
-    def __init__(self):
+    def __init__(self, incremental=False):
         self._file_textures = None
         self._mapping = None
+        self._inventory = None
+        if incremental:
+            self.set_incremental(True)
+
+    @property
+    def incremental(self):
+        return self._inventory is not None
+
+    def set_incremental(self, incremental=True):
+        ''' keep a TextureInventory of the scene which is updated from scene
+        messages so that scene wide queries only resolve changed nodes '''
+        if incremental and self._inventory is None:
+            self._inventory = TextureInventory(self)
+            self._inventory.start()
+        elif not incremental and self._inventory is not None:
+            self._inventory.stop()
+            self._inventory = None
 
     @classmethod
     def get_texture_types(cls):
@@ -39,62 +68,135 @@ class TextureMapper(object):
     def unregister_texture_type(cls, texture_type):
         cls.__texture_types__.remove(texture_type)
 
-    def get_all(self, selection=False, reference_nodes=False):
-        ''':return: list of TextureNode'''
+    def get_all(self, selection=False, reference_nodes=False, namespace=None,
+                reference=None):
+        ''' texture nodes of all registered types reachable from the given
+        scopes. The selection is expanded through the shading networks of
+        selected geometry, the namespace includes its child namespaces and
+        reference is a FileReference or reference node. Only the nodes of
+        the scopes are visited
+
+        reference_nodes is not applied, callers rely on getting the nodes of
+        references along with the others
+        :return: list of TextureNode'''
+        scope = scope_nodes(selection=selection, namespace=namespace,
+                            reference=reference)
         t_nodes = []
         for typ in self.get_texture_types():
-            new_t_nodes = typ.get_all(selection=False,
-                                      reference_nodes=False)
+            new_t_nodes = typ.get_all(scope=scope)
             t_nodes.extend(new_t_nodes)
         return t_nodes
 
-    def get_nodes(self, selection=False, reference_nodes=False):
+    def get_nodes(self, selection=False, reference_nodes=False,
+                  namespace=None, reference=None):
         return [t_node.node for t_node in
                 self.get_all(selection=selection,
-                             reference_nodes=reference_nodes)]
-
-    def collect_textures(self, dest, texture_files=None):
-        ''':type texture_files: SetDict'''
-        mapping = PathMapping()
-
+                             reference_nodes=reference_nodes,
+                             namespace=namespace, reference=reference)]
+
+    def collect_textures(self, dest, texture_files=None, workers=None,
+                         resume=True, dedup=False):
+        ''':type texture_files: SetDict
+        :workers: number of copy threads, CopyEngine.workers if None
+        :resume: journal copies in dest so an interrupted collection resumes
+        :dedup: copy files with identical content only once and map all of
+        them to the single collected file
+        '''
         if not op.exists(dest) or not op.isdir(dest):
             raise IOError('%s does not exist or is not a directory' % dest)
 
         if not texture_files:
             texture_files = self.get_texture_files()
 
-        total = len(texture_files.reduced())
+        duplicates = None
+        if dedup:
+            duplicates = find_duplicates(
+                    texture_files.reduced(),
+                    workers=workers or CopyEngine.workers)
+
+        planner = CollectionPlanner(dest, duplicates=duplicates)
+        mapping = planner.plan(texture_files)
+
+        total = len(texture_files.reduced()) - planner.deduplicated
         count = 0
         logger.info('Max:CollectTextures:%s' % total)
 
-        for myftn in texture_files:
-            if myftn in mapping:
-                continue
-            ftns, texs = iutil.find_related_ftns(myftn, texture_files.copy())
-            new_mappings = iutil.lCUFTN(dest, ftns, texs)
-            for fl, copy_to in new_mappings.items():
-                if op.exists(fl) and op.isfile(fl):
-                    count += 1
-                    logger.info('Progress:CollectTextures:%s of %s' % (
-                        count, total))
-                    shutil.copy(fl, copy_to)
-            mapping.update(new_mappings)
+        engine = CopyEngine(dest, workers=workers, journal=resume)
+        for fl, copy_to, status in engine.run(planner.copies.items()):
+            if status is not None:
+                count += 1
+                logger.info('Progress:CollectTextures:%s of %s' % (
+                    count, total))
 
         logger.info('Max:CollectTextures:0')
         logger.info('%d Textures collected!' % total)
 
         return mapping
 
-    def get_texture_files(self, selection=False, key=lambda x: True,
-                          aux=True, return_as_dict=True):
-        '''return all texture files in the scene'''
+    @classmethod
+    def iter_resolve(cls, t_nodes, key=lambda x: True, aux=True):
+        ''' resolve the existing texture files of t_nodes in batches of
+        batch_size nodes, results are yielded as soon as their batch is
+        resolved. The scans are only active while a batch is resolved, not
+        while its results are consumed, the directory listings are kept for
+        the following batches
+        :return: generator of (TextureNode, SetDict)'''
+        t_nodes = list(t_nodes)
+        cache = DirectoryCache()
+        for start in range(0, len(t_nodes), cls.batch_size):
+            batch = t_nodes[start:start + cls.batch_size]
+            for result in cls._resolve_batch(batch, cache, key, aux):
+                yield result
+
+    @staticmethod
+    def _resolve_batch(batch, cache, key, aux):
+        with DirectoryCache.scan(cache) as cache, \
+                AttributeSnapshot.scan() as snapshot:
+            snapshot.read_all(batch)
+            cache.prefetch([op.dirname(t_node.get_path())
+                            for t_node in batch])
+
+            candidates = [(t_node, t_node.get_candidates(key=key, aux=aux))
+                          for t_node in batch]
+            cache.exists_many([path for _, t_texs in candidates
+                               for path in t_texs.reduced()])
+
+            return [(t_node, t_node.existing(t_texs))
+                    for t_node, t_texs in candidates]
 
-        file_texs = SetDict()
-        t_nodes = self.get_all()
+    @classmethod
+    def resolve(cls, t_nodes, key=lambda x: True, aux=True):
+        ''' resolve the existing texture files of all t_nodes
+        :return: list of (TextureNode, SetDict)'''
+        return list(cls.iter_resolve(t_nodes, key=key, aux=aux))
+
+    def iter_texture_files(self, selection=False, key=lambda x: True,
+                           aux=True, namespace=None, reference=None):
+        ''' texture files of the scene or of the given scopes yielded as
+        each node is resolved
+        :return: generator of (node, ftn, set of files)'''
+        for t_node, t_texs in self.iter_resolve(
+                self.get_all(selection=selection, namespace=namespace,
+                             reference=reference), key=key, aux=aux):
+            for ftn, files in t_texs.items():
+                yield t_node.node, ftn, files
 
-        for t_node in t_nodes:
-            t_texs = t_node.get_textures()
-            file_texs.update(t_texs)
+    def get_texture_files(self, selection=False, key=lambda x: True,
+                          aux=True, return_as_dict=True, namespace=None,
+                          reference=None):
+        '''return all texture files in the scene or in the given scopes. The
+        incremental inventory answers for the whole scene with a read only
+        SetDictView, copy it to change it'''
+
+        if (self._inventory is not None and not selection and
+                not namespace and reference is None):
+            file_texs = self._inventory.get_texture_files(key=key, aux=aux)
+        else:
+            file_texs = SetDict()
+            for _, ftn, files in self.iter_texture_files(
+                    selection=selection, key=key, aux=aux,
+                    namespace=namespace, reference=reference):
+                file_texs[ftn].update(files)
 
         self._file_textures = file_texs
 
@@ -103,16 +205,38 @@ class TextureMapper(object):
         else:
             return list(file_texs.reduced())
 
-    def map_textures(self, mapping, selection=False, reference_nodes=False):
-
-        reverse = {}
-
-        for t_node in self.get_all(selection=selection,
-                                   reference_nodes=reference_nodes):
-            for k, v in t_node.map_texture(mapping):
-                reverse[k] = v
-
-        return reverse
+    def update_manifest(self, manifest=None, key=lambda x: True, aux=True):
+        ''' bring a TextureManifest up to date with the scene, only nodes
+        that changed since it was recorded are resolved. A manifest recorded
+        with a different aux setting is rebuilt
+        :return: (TextureManifest, SetDict of all texture files)'''
+        if manifest is None or manifest.aux != aux:
+            manifest = TextureManifest(aux=aux)
+        manifest.update(self, self.get_all())
+        self._file_textures = manifest.texture_files(key=key)
+        return manifest, self._file_textures
+
+    def map_textures(self, mapping, selection=False, reference_nodes=False,
+                     namespace=None, reference=None):
+        ''' set the paths of all texture nodes which are found in mapping.
+        All new paths are computed first and then set in a single undo step
+        :return: reverse mapping {new: old}'''
+        t_nodes = self.get_all(selection=selection,
+                               reference_nodes=reference_nodes,
+                               namespace=namespace, reference=reference)
+
+        changes = []
+        with AttributeSnapshot.scan() as snapshot:
+            snapshot.read_all(t_nodes)
+            for t_node in t_nodes:
+                remapped = t_node.remap(mapping)
+                if remapped is not None:
+                    changes.append((t_node, remapped))
+
+        set_paths([(t_node, new) for t_node, (new, old) in changes],
+                  undo_name='mapTextures')
+
+        return dict(remapped for _, remapped in changes)
 
     def get_mapping(self, newdir, olddir=None, texture_files=None):
         ''' Calculate a texture mapping dictionary
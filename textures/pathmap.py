@@ -9,8 +9,9 @@ __all__ = ['PathMapping']
 class PathMapping(dict):
     '''An extension of a python dictionary which enables lookups for paths
     using tokens.
-    Misses / or token based lookups cost n where n is the size of the
-    dictionary'''
+    A secondary index keyed by the normalized directory and the tokenized
+    basename stem is kept in sync with the dictionary, so misses and token
+    based lookups only cost the number of keys sharing a directory and stem'''
 
     curdir = '.'
 
@@ -20,6 +21,22 @@ class PathMapping(dict):
             '\\?+': lambda tt: '\d{%d}' % len(tt),
             '#+': lambda tt: '\d{%d}' % len(tt)
     }
+    __token_patterns__ = [re.compile(token, re.I) for token in __tokens__]
+
+    _digits_re = re.compile(r'\d+')
+    _markers_re = re.compile('\0+')
+    _marker = '\0'
+    _pattern_cache = {}
+    _pattern_cache_size = 1024
+
+    def __init__(self, *args, **kwargs):
+        super(PathMapping, self).__init__()
+        self._index = {}
+        self._normkeys = {}
+        self.update(*args, **kwargs)
+
+    def __reduce__(self):
+        return (self.__class__, (dict(self),))
 
     @classmethod
     def token_re(cls, token_type):
@@ -36,36 +53,78 @@ class PathMapping(dict):
     @classmethod
     def token_type(cls, key):
         dirname, basename = os.path.split(key)
-        for token in cls.__tokens__:
-            match = re.search(token, basename, re.I)
+        for pattern in cls.__token_patterns__:
+            match = pattern.search(basename)
             if match:
                 return match.group()
         return ''
 
+    @classmethod
+    def stem_key(cls, basename, token_type=''):
+        '''The tokenized stem of a basename. Digit runs and tokens collapse
+        into a single marker so that a concrete path and a token path for it
+        share the same stem'''
+        parts = basename.split(token_type) if token_type else [basename]
+        stem = cls._marker.join(
+                cls._digits_re.sub(cls._marker, part) for part in parts)
+        return cls._markers_re.sub(cls._marker, stem)
+
+    @classmethod
+    def key_pattern(cls, basename, token_type):
+        '''compiled pattern which matches concrete basenames for a tokenized
+        basename'''
+        pattern = cls._pattern_cache.get((basename, token_type))
+        if pattern is None:
+            if len(cls._pattern_cache) >= cls._pattern_cache_size:
+                cls._pattern_cache.clear()
+            pattern = re.compile(re.escape(basename).replace(
+                re.escape(token_type), cls.token_re(token_type)) + '$')
+            cls._pattern_cache[(basename, token_type)] = pattern
+        return pattern
+
+    def _index_key(self, key):
+        normkey = os.path.normpath(key)
+        dirname, basename = os.path.split(normkey)
+        self._normkeys.setdefault(normkey, key)
+        self._index.setdefault(
+                (dirname, self.stem_key(basename)), {})[key] = basename
+
+    def _unindex_key(self, key):
+        normkey = os.path.normpath(key)
+        dirname, basename = os.path.split(normkey)
+        if self._normkeys.get(normkey) == key:
+            del self._normkeys[normkey]
+        bucket_key = (dirname, self.stem_key(basename))
+        bucket = self._index.get(bucket_key, {})
+        bucket.pop(key, None)
+        if not bucket:
+            self._index.pop(bucket_key, None)
+        for _key, _basename in bucket.items():
+            if os.path.normpath(_key) == normkey:
+                self._normkeys.setdefault(normkey, _key)
+
     def key_matches(self, key, frame_no=False):
         matches = []
         key = os.path.normpath(key)
         dirname, basename = os.path.split(key)
 
         token_type = self.token_type(basename)
-
-        key_pat = basename
-        if token_type:
-            token_re = self.token_re(token_type)
-            key_pat = basename.replace(token_type, token_re)
-        else:
-            frame_no = False
-        dirname = os.path.join(dirname, '').replace('\\', '\\\\')
-        key_pat = dirname + key_pat
-
-        for _key in self.keys():
-            match = re.match(key_pat, os.path.normpath(_key))
+        if not token_type:
+            _key = self._normkeys.get(key)
+            if _key is None:
+                return matches
+            return [(_key, '') if frame_no else _key]
+
+        pattern = self.key_pattern(basename, token_type)
+        bucket = self._index.get(
+                (dirname, self.stem_key(basename, token_type)), {})
+        for _key in sorted(bucket):
+            match = pattern.match(bucket[_key])
             if match:
                 if frame_no:
-                    matches.append((
-                        match.group(), match.group(1)))
+                    matches.append((_key, match.group(1)))
                 else:
-                    matches.append(match.group())
+                    matches.append(_key)
         return matches
 
     def replace_with_tokens(self, key, val, match):
@@ -83,8 +142,14 @@ class PathMapping(dict):
             return default
 
     def __setitem__(self, key, value):
+        if not super(PathMapping, self).__contains__(key):
+            self._index_key(key)
         super(PathMapping, self).__setitem__(key, value)
 
+    def __delitem__(self, key):
+        super(PathMapping, self).__delitem__(key)
+        self._unindex_key(key)
+
     def __getitem__(self, key):
         try:
             return super(PathMapping, self).__getitem__(key)
@@ -98,6 +163,35 @@ class PathMapping(dict):
     def __contains__(self, key):
         if super(PathMapping, self).__contains__(key):
             return True
-        return self.key_matches(key)
+        return bool(self.key_matches(key))
 
     has_key = __contains__
+
+    def update(self, *args, **kwargs):
+        for other in args + (kwargs,):
+            items = other.items() if hasattr(other, 'keys') else other
+            for key, value in items:
+                self[key] = value
+
+    def setdefault(self, key, default=None):
+        if not super(PathMapping, self).__contains__(key):
+            self[key] = default
+        return super(PathMapping, self).__getitem__(key)
+
+    def pop(self, key, *args):
+        if super(PathMapping, self).__contains__(key):
+            self._unindex_key(key)
+        return super(PathMapping, self).pop(key, *args)
+
+    def popitem(self):
+        key, value = super(PathMapping, self).popitem()
+        self._unindex_key(key)
+        return key, value
+
+    def clear(self):
+        super(PathMapping, self).clear()
+        self._index.clear()
+        self._normkeys.clear()
+
+    def copy(self):
+        return self.__class__(self)
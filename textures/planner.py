@@ -0,0 +1,162 @@
+'''Contains the planner which resolves name clashes when textures are
+collected to a flat directory'''
+
+import os.path as op
+
+from .pathmap import PathMapping
+
+
+__all__ = ['CollectionPlanner']
+
+
+class CollectionPlanner(object):
+    ''' Maps all the texture files of a SetDict to a single flat directory in
+    one pass.
+
+    Every ftn is mapped as a group with all of its files, so tiles, frames
+    and aux files of one ftn are renamed together and tokens in the ftn keep
+    resolving to the renamed files. ftns which share files, e.g. a udim path
+    and the path of one of its tiles, form one group. Destination basenames
+    are compared case insensitively, a group clashes when any of its
+    destinations is already claimed by a different source file.
+
+    If duplicates, as returned by find_duplicates, are given then a group
+    whose files have all been collected already from identical files, under
+    the names the group would use, is mapped to those without being copied
+    again. Groups of a single file are mapped to their duplicate regardless
+    of its name '''
+
+    suffix = '_%d'
+
+    def __init__(self, dest, duplicates=None):
+        self.dest = dest
+        self.duplicates = duplicates or {}
+        self.deduplicated = 0
+        self._claimed = {}
+        self._collected = {}
+        self.mapping = PathMapping()
+        self.copies = {}
+
+    @classmethod
+    def rename(cls, basename, number):
+        ''' add a numbered suffix to the stem of a basename, the stem ends at
+        the first dot so that frame numbers, tokens and extensions are kept
+        intact '''
+        if not number:
+            return basename
+        parts = basename.split('.', 1)
+        parts[0] += cls.suffix % number
+        return '.'.join(parts)
+
+    @staticmethod
+    def _source_key(path):
+        return op.normcase(op.normpath(path))
+
+    def _clashes(self, paths, number):
+        for path in paths:
+            claimed = self._claimed.get(
+                    self.rename(op.basename(path), number).lower())
+            if claimed is not None and claimed != self._source_key(path):
+                return True
+        return False
+
+    def _collected_number(self, paths):
+        ''' the number with which all files of a group have already been
+        collected from their duplicates, None if the group must be copied '''
+        files = [path for path in paths if path in self.duplicates]
+        if not files:
+            return None
+        collected = [self._collected.get(self.duplicates[path])
+                     for path in files]
+        if None in collected:
+            return None
+        number = collected[0][1]
+        for path, (dest, _) in zip(files, collected):
+            if (self.rename(op.basename(path), number).lower() !=
+                    op.basename(dest).lower()):
+                return None
+        return number
+
+    def _planned(self, path):
+        # the mapping matches token keys against concrete paths, only an
+        # exact key means that the path is planned
+        return dict.__contains__(self.mapping, path)
+
+    def add(self, ftn, files=()):
+        ''' map an ftn and its files to the destination directory
+        :return: the number used to rename the group, 0 if not renamed '''
+        return self.add_group([ftn], files)
+
+    def add_group(self, ftns, files=()):
+        ''' map ftns and all of their files to the destination directory with
+        the same number
+        :return: the number used to rename the group, 0 if not renamed '''
+        files = set(files)
+        paths = [ftn for ftn in sorted(set(ftns)) if ftn not in files]
+        paths = [path for path in paths + sorted(files)
+                 if not self._planned(path)]
+        if not paths:
+            return 0
+
+        if len(paths) == 1 and paths[0] in self.duplicates:
+            collected = self._collected.get(self.duplicates[paths[0]])
+            if collected is not None:
+                self.mapping[paths[0]] = collected[0]
+                self.deduplicated += 1
+                return collected[1]
+
+        number = self._collected_number(paths)
+        if number is not None:
+            for path in paths:
+                self.mapping[path] = op.join(
+                        self.dest, self.rename(op.basename(path), number))
+                self.deduplicated += path in self.duplicates
+            return number
+
+        number = 0
+        while self._clashes(paths, number):
+            number += 1
+        for path in paths:
+            basename = self.rename(op.basename(path), number)
+            self._claimed[basename.lower()] = self._source_key(path)
+            self.mapping[path] = self.copies[path] = op.join(
+                    self.dest, basename)
+            if path in self.duplicates:
+                self._collected.setdefault(
+                        self.duplicates[path], (self.mapping[path], number))
+        return number
+
+    @staticmethod
+    def groups(texture_files):
+        ''' ftns grouped by the files they share
+        :type texture_files: SetDict
+        :return: sorted list of (ftns, files)'''
+        parents = {}
+
+        def root(ftn):
+            while parents[ftn] != ftn:
+                parents[ftn] = parents[parents[ftn]]
+                ftn = parents[ftn]
+            return ftn
+
+        owners = {}
+        for ftn in sorted(texture_files):
+            parents.setdefault(ftn, ftn)
+            for path in [ftn] + sorted(texture_files[ftn]):
+                owner = owners.setdefault(path, ftn)
+                if owner != ftn:
+                    parents[root(owner)] = root(ftn)
+
+        groups = {}
+        for ftn in sorted(texture_files):
+            ftns, files = groups.setdefault(root(ftn), ([], set()))
+            ftns.append(ftn)
+            files.update(texture_files[ftn])
+        return sorted(groups.values())
+
+    def plan(self, texture_files):
+        ''':type texture_files: SetDict
+        :return: PathMapping of all ftns and their files'''
+        for ftns, files in self.groups(texture_files):
+            self.add_group(ftns, files)
+        return self.mapping
@@ -1,12 +1,18 @@
 '''Contains classes for handling redshift texture nodes'''
-import os
+try:
+    import pymel.core as pc
+except:
+    pass
 
-import pymel.core as pc
-
-import iutil
+try:
+    import iutil
+except:
+    pass
 
 from .base import TextureNode
 from .setdict import SetDict
+from .dircache import (get_uv_tiles, get_sequence_files,
+                       get_file_by_extension, is_file)
 
 
 __all__ = ['RedshiftSprite', 'RedshiftNormalMap']
@@ -15,6 +21,7 @@ __all__ = ['RedshiftSprite', 'RedshiftNormalMap']
 class _RedshiftTextureNode(TextureNode):
     _path_read_attr = 'tex0'
     _path_write_attr = 'tex0'
+    _snapshot_attrs = ('tex0', 'useFrameExtension')
 
     uv_tiling_modes = ['None', 'zbrush', 'mudbox', 'mari', 'explicit']
 
@@ -23,17 +30,17 @@ class _RedshiftTextureNode(TextureNode):
 
         files = []
 
-        if pc.getAttr(self.node + '.useFrameExtension'):
-            seqTex = iutil.getSequenceFiles(path)
+        if self.get_attr('useFrameExtension'):
+            seqTex = get_sequence_files(path)
             if seqTex:
                 files.extend(seqTex)
 
         udim_mode = iutil.detectUdim(path)
         if udim_mode:
-            tiles = iutil.getUVTiles(path, udim_mode)
+            tiles = get_uv_tiles(path, udim_mode)
             files.extend(tiles)
 
-        if os.path.exists(path) and os.path.isfile(path):
+        if is_file(path):
             files.append(path)
 
         return files
@@ -43,26 +50,26 @@ class _RedshiftTextureNode(TextureNode):
             texs = self._get_textures()
         auxs = []
         for tex in texs:
-            tex = iutil.getFileByExtension(tex, 'tex')
+            tex = get_file_by_extension(tex, 'tex')
             if tex:
                 auxs.append(tex)
         return auxs
 
-    def get_textures(self, aux=True, key=lambda x: True):
+    def get_candidates(self, aux=True, key=lambda x: True):
         path = self.get_path()
         files = self._get_textures()
         if aux:
-            print self.get_aux_files(files)
             files.extend(self.get_aux_files(files))
         files = [file_ for file_ in files if key(file_)]
         return SetDict({path: files})
 
     @classmethod
-    def get_all(cls, selection=False, reference_nodes=False):
+    def get_all(cls, selection=False, reference_nodes=False, scope=None):
         if not pc.pluginInfo('redshift4maya', q=True, l=True):
             return []
         return super(_RedshiftTextureNode, cls).get_all(
-                selection=selection, reference_nodes=reference_nodes)
+                selection=selection, reference_nodes=reference_nodes,
+                scope=scope)
 
 
 class RedshiftSprite(_RedshiftTextureNode):
@@ -0,0 +1,81 @@
+'''Contains functions for limiting texture scans to a part of the scene'''
+
+try:
+    import maya.cmds as cmds
+except:
+    pass
+
+
+__all__ = ['scope_nodes']
+
+
+def selection_nodes():
+    ''' the selected nodes along with everything upstream of the shading
+    engines of the selected geometry. Selected shading engines and shading
+    nodes are expanded upstream as well '''
+    selection = cmds.ls(sl=True, objectsOnly=True) or []
+    if not selection:
+        return []
+    shapes = cmds.ls(selection, dag=True, shapes=True, noIntermediate=True)
+    roots = list(set(selection).difference(
+        cmds.ls(selection, type='dagNode') or []))
+    if shapes:
+        roots.extend(set(cmds.listConnections(
+            shapes, type='shadingEngine') or []))
+    if not roots:
+        return selection
+    history = cmds.listHistory(roots, pruneDagObjects=True) or []
+    return list(set(history).union(selection))
+
+
+def namespace_nodes(namespace):
+    ''' all dependency nodes in namespace and its child namespaces '''
+    namespace = ':' + namespace.strip(':')
+    if not cmds.namespace(exists=namespace):
+        return []
+    return cmds.namespaceInfo(
+            namespace, listOnlyDependencyNodes=True, recurse=True,
+            dagPath=True) or []
+
+
+def reference_nodes(reference):
+    ''' all nodes brought in by a reference and by the references nested in
+    it, which referenceQuery does not list with the nodes of the reference
+    :type reference: pymel.core.system.FileReference or reference node'''
+    nodes = set()
+    pending = [str(getattr(reference, 'refNode', reference))]
+    done = set()
+    while pending:
+        ref_node = pending.pop()
+        if ref_node in done:
+            continue
+        done.add(ref_node)
+        try:
+            nodes.update(cmds.referenceQuery(
+                ref_node, nodes=True, dagPath=True) or [])
+            pending.extend(cmds.referenceQuery(
+                ref_node, child=True, referenceNode=True) or [])
+        except RuntimeError:
+            # unloaded references have no nodes
+            continue
+    return sorted(nodes)
+
+
+def scope_nodes(selection=False, namespace=None, reference=None):
+    ''' names of the nodes in the intersection of all given scopes
+    :return: None if no scope is given which stands for the entire scene'''
+    scopes = []
+    if selection:
+        scopes.append(selection_nodes())
+    if namespace:
+        scopes.append(namespace_nodes(namespace))
+    if reference is not None:
+        scopes.append(reference_nodes(reference))
+    if not scopes:
+        return None
+    if len(scopes) == 1:
+        return scopes[0]
+    nodes = set(cmds.ls(scopes[0], long=True) or [])
+    for scope in scopes[1:]:
+        nodes.intersection_update(cmds.ls(scope, long=True) or [])
+    return sorted(nodes)
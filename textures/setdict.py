@@ -1,18 +1,176 @@
 '''Contains SetDict utility class'''
 
+import collections
 
-__all__ = ['SetDict']
+
+__all__ = ['SetDict', 'SetDictView']
+
+
+class _TrackedSet(set):
+    ''' A set which reports additions and removals to the SetDict that owns
+    it so that its reduced view stays up to date '''
+    _owner = None
+
+    def __init__(self, iterable=(), owner=None):
+        super(_TrackedSet, self).__init__(iterable)
+        self._owner = owner
+        if owner is not None:
+            owner._acquire(self)
+
+    def add(self, item):
+        if item not in self:
+            super(_TrackedSet, self).add(item)
+            if self._owner is not None:
+                self._owner._acquire((item,))
+
+    def update(self, *iterables):
+        new = set().union(*iterables).difference(self)
+        super(_TrackedSet, self).update(new)
+        if self._owner is not None:
+            self._owner._acquire(new)
+
+    def discard(self, item):
+        if item in self:
+            super(_TrackedSet, self).discard(item)
+            if self._owner is not None:
+                self._owner._release((item,))
+
+    def remove(self, item):
+        super(_TrackedSet, self).remove(item)
+        if self._owner is not None:
+            self._owner._release((item,))
+
+    def pop(self):
+        item = super(_TrackedSet, self).pop()
+        if self._owner is not None:
+            self._owner._release((item,))
+        return item
+
+    def clear(self):
+        if self._owner is not None:
+            self._owner._release(self)
+        super(_TrackedSet, self).clear()
+
+    def difference_update(self, *iterables):
+        old = self.intersection(set().union(*iterables))
+        super(_TrackedSet, self).difference_update(old)
+        if self._owner is not None:
+            self._owner._release(old)
+
+    def intersection_update(self, *iterables):
+        old = self.difference(self.intersection(*iterables))
+        self.difference_update(old)
+
+    def symmetric_difference_update(self, iterable):
+        iterable = set(iterable)
+        old = self.intersection(iterable)
+        self.difference_update(old)
+        self.update(iterable.difference(old))
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __iand__(self, other):
+        self.intersection_update(other)
+        return self
+
+    def __isub__(self, other):
+        self.difference_update(other)
+        return self
+
+    def __ixor__(self, other):
+        self.symmetric_difference_update(other)
+        return self
+
+    def copy(self):
+        return set(self)
+
+    def __reduce__(self):
+        return (set, (list(self),))
+
+
+class _ReducedView(collections.Set):
+    ''' A live, read only view on the union of all the values of a SetDict,
+    which are the keys of its counts, or on a single one of its values '''
+
+    def __init__(self, counts):
+        self._counts = counts
+
+    def __contains__(self, item):
+        return item in self._counts
+
+    def __iter__(self):
+        return iter(self._counts)
+
+    def __len__(self):
+        return len(self._counts)
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, list(self._counts))
+
+    @classmethod
+    def _from_iterable(cls, iterable):
+        return set(iterable)
+
+    def snapshot(self):
+        return set(self._counts)
+
+    def union(self, *iterables):
+        return self.snapshot().union(*iterables)
+
+    def intersection(self, *iterables):
+        return self.snapshot().intersection(*iterables)
+
+    def difference(self, *iterables):
+        return self.snapshot().difference(*iterables)
+
+    def issubset(self, other):
+        return self <= set(other)
+
+    def issuperset(self, other):
+        return self >= set(other)
+
+    copy = snapshot
 
 
 class SetDict(dict):
     ''' A type of dictionary which can only have sets as its values and update
-    performs union on sets
+    performs union on sets.
+    The union of all values is maintained as reference counts which are kept
+    up to date by all insertions and deletions, so it never has to be rebuilt.
+
+    A set assigned to a key is copied into a set which reports its changes,
+    so changing the assigned set afterwards does not change the SetDict, the
+    set to change is the one returned for the key
     '''
     def __init__(self, *args, **kwargs):
-        super(SetDict, self).__init__(*args, **kwargs)
-        for k, v in self.iteritems():
-            if not isinstance(v, set):
-                self[k] = set(v)
+        super(SetDict, self).__init__()
+        self._counts = {}
+        for k, v in dict(*args, **kwargs).iteritems():
+            self[k] = v if isinstance(v, set) else set(v)
+
+    def __reduce__(self):
+        return (self.__class__, (dict((k, set(v)) for k, v in self.items()),))
+
+    def _acquire(self, items):
+        counts = self._counts
+        for item in items:
+            counts[item] = counts.get(item, 0) + 1
+
+    def _release(self, items):
+        counts = self._counts
+        for item in items:
+            count = counts[item] - 1
+            if count:
+                counts[item] = count
+            else:
+                del counts[item]
+
+    def _detach(self, val):
+        if isinstance(val, _TrackedSet) and val._owner is self:
+            self._release(val)
+            val._owner = None
 
     def __getitem__(self, key):
         if key not in self:
@@ -22,17 +180,88 @@ class SetDict(dict):
     def __setitem__(self, key, val):
         if not isinstance(val, set):
             raise TypeError('value must be a set')
-        super(SetDict, self).__setitem__(key, val)
+        old = super(SetDict, self).get(key)
+        if old is val:
+            return
+        if old is not None:
+            self._detach(old)
+        super(SetDict, self).__setitem__(key, _TrackedSet(val, owner=self))
+
+    def __delitem__(self, key):
+        self._detach(super(SetDict, self).__getitem__(key))
+        super(SetDict, self).__delitem__(key)
 
     def get(self, key, *args, **kwargs):
         return self.__getitem__(key)
 
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = set() if default is None else default
+        return super(SetDict, self).__getitem__(key)
+
+    def pop(self, key, *args):
+        if key in self:
+            self._detach(super(SetDict, self).__getitem__(key))
+        return super(SetDict, self).pop(key, *args)
+
+    def popitem(self):
+        key, val = super(SetDict, self).popitem()
+        self._detach(val)
+        return key, val
+
+    def clear(self):
+        for val in self.values():
+            val._owner = None
+        super(SetDict, self).clear()
+        self._counts.clear()
+
+    def copy(self):
+        return self.__class__(
+                dict((k, set(v)) for k, v in self.iteritems()))
+
     def update(self, d):
         if not isinstance(d, SetDict):
             raise TypeError("update argument must be a SetDict")
         for k, v in d.iteritems():
             self[k].update(v)
 
-    def reduced(self):
-        '''returns a set which is a union union of all values'''
-        return reduce(lambda a, b: a.union(b), self.values(), set())
+    def reduced(self, snapshot=False):
+        '''returns the union of all values. This is a live read-only view
+        unless a snapshot is requested in which case a new set is returned'''
+        if snapshot:
+            return set(self._counts)
+        return _ReducedView(self._counts)
+
+    def view(self):
+        '''returns a live read-only view of the SetDict'''
+        return SetDictView(self)
+
+
+class SetDictView(collections.Mapping):
+    ''' A live, read only view on a SetDict. Its values are read only views
+    of the sets, missing keys are not inserted and copy returns a SetDict
+    which may be changed '''
+
+    def __init__(self, setdict):
+        self._setdict = setdict
+
+    def __getitem__(self, key):
+        return _ReducedView(dict.__getitem__(self._setdict, key))
+
+    def __contains__(self, key):
+        return key in self._setdict
+
+    def __iter__(self):
+        return iter(self._setdict)
+
+    def __len__(self):
+        return len(self._setdict)
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, self._setdict)
+
+    def reduced(self, snapshot=False):
+        return self._setdict.reduced(snapshot=snapshot)
+
+    def copy(self):
+        return self._setdict.copy()
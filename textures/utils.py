@@ -1,8 +1,12 @@
 '''Contains some utility function for imaya.textures package'''
 
-import pymel.core as pc
 import os.path as op
 
+try:
+    import pymel.core as pc
+except:
+    pass
+
 
 __all__ = ['readPathAttr']
 
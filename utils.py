@@ -4,6 +4,7 @@ import maya.cmds as cmds
 import os.path as op
 
 import functools
+import contextlib
 
 
 def objSetDiff(new, cur):
@@ -88,6 +89,72 @@ def undoChunk(func):
     return _wrapper
 
 
+@contextlib.contextmanager
+def undoChunkContext(name=None):
+    '''the context manager form of undoChunk, all changes made in the context
+    are wrapped in a single undo chunk which is closed even on errors'''
+    if name:
+        cmds.undoInfo(openChunk=True, chunkName=name)
+    else:
+        cmds.undoInfo(openChunk=True)
+    try:
+        yield
+    finally:
+        cmds.undoInfo(closeChunk=True)
+
+
+_refresh_suspended = [0]
+
+
+@contextlib.contextmanager
+def suspendRefresh():
+    '''suspend the refresh of the viewports while in the context, nested
+    contexts leave refreshing to the outermost one'''
+    if not _refresh_suspended[0]:
+        cmds.refresh(suspend=True)
+    _refresh_suspended[0] += 1
+    try:
+        yield
+    finally:
+        _refresh_suspended[0] -= 1
+        if not _refresh_suspended[0]:
+            cmds.refresh(suspend=False)
+
+
+@contextlib.contextmanager
+def suspendViewport():
+    '''pause viewport 2.0 while in the context so that the scene is not
+    evaluated for drawing, nothing is done without a user interface'''
+    if cmds.about(batch=True) or cmds.ogs(q=True, pause=True):
+        yield
+        return
+    # ogs -pause toggles
+    cmds.ogs(pause=True)
+    try:
+        yield
+    finally:
+        cmds.ogs(pause=True)
+
+
+@contextlib.contextmanager
+def suspendEvaluation():
+    '''switch the evaluation manager off, to DG evaluation, while in the
+    context so that the evaluation graph is not invalidated and rebuilt after
+    every change but once when the previous mode is restored. Nothing is done
+    where there is no evaluation manager or it is off already'''
+    mode = None
+    if hasattr(cmds, 'evaluationManager'):
+        mode = (cmds.evaluationManager(q=True, mode=True) or [None])[0]
+    if mode in (None, 'off'):
+        yield
+        return
+    cmds.evaluationManager(mode='off')
+    try:
+        yield
+    finally:
+        cmds.evaluationManager(mode=mode)
+
+
 def getBitString():
     if pc.about(is64=True):
         return '64bit'